@@ -150,6 +150,105 @@ DATABASES = {
     }
 }
 
+# Set DB_PGBOUNCER when DB_HOST/DB_PORT point at a transaction-mode PgBouncer:
+# connections are then handed back after every request, server-side cursors
+# (which need a session) are off, and prepared statements default to off.
+DB_PGBOUNCER = str(os.getenv("DB_PGBOUNCER", False)).lower() in ("true", "1", "yes")
+
+# Keep connections open between requests instead of reconnecting on every
+# API hit (PgBouncer does the pooling when DB_PGBOUNCER is set), and verify a
+# reused connection before handing it to a request.
+for _db in DATABASES.values():
+    _db['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 0 if DB_PGBOUNCER else 600))
+    _db['CONN_HEALTH_CHECKS'] = True
+    _db['DISABLE_SERVER_SIDE_CURSORS'] = DB_PGBOUNCER
+    if os.getenv('DB_SSLMODE'):
+        _db['OPTIONS'] = {'sslmode': os.getenv('DB_SSLMODE')}
+
+# Run the hot search queries as server-side prepared statements (PREPARE
+# once per connection, then EXECUTE). Turn off behind a transaction-mode
+# PgBouncer, where a session's prepared statements are not kept.
+TFBS_PREPARED_STATEMENTS = str(os.getenv("TFBS_PREPARED_STATEMENTS", not DB_PGBOUNCER)).lower() in ("true", "1", "yes")
+
+# Filter cell-line searches by joining against an UNLOGGED table of that cell
+# line's IDs (created on first use) instead of binding the whole ID array on
+# every query. Needs CREATE rights on the species databases and is skipped
+# when reads go to a replica.
+TFBS_CELL_LINE_TABLES = str(os.getenv("TFBS_CELL_LINE_TABLES", False)).lower() in ("true", "1", "yes")
+
+# Optional read replica for the species databases. Every TFBS query is a
+# read, so when REPLICA_DB_HOST is set they are sent to the replica and the
+# primaries only see ingestion; sessions and auth stay on 'default'.
+READ_DATABASE_ALIASES = {}
+if os.getenv('REPLICA_DB_HOST'):
+    for _species in ('human', 'mouse'):
+        DATABASES[f'{_species}_replica'] = {
+            **DATABASES[_species],
+            'HOST': os.getenv('REPLICA_DB_HOST'),
+            'PORT': os.getenv('REPLICA_DB_PORT', DATABASES[_species]['PORT']),
+            'TEST': {'MIRROR': _species},
+        }
+        READ_DATABASE_ALIASES[_species] = f'{_species}_replica'
+
+# Read cell-line filtered batch counts from the tfbs_name_counts_by_cellline
+# table (built by `python manage.py build_cellline_tf_counts`) instead of the
+# in-process count arrays.
+TFBS_CELL_LINE_COUNT_TABLE = str(os.getenv("TFBS_CELL_LINE_COUNT_TABLE", False)).lower() in ("true", "1", "yes")
+
+# Answer genomic-location searches from the per-chromosome index files written
+# by instruction/export_position_index.py (memory-mapped) instead of a range
+# scan on every request. On by default only when an export is present;
+# chromosomes without a file still use SQL.
+_POSITION_INDEX_EXPORTED = any(
+    (BASE_DIR / 'staticfiles' / 'documents' / f'position_index_{_species}').is_dir()
+    for _species in ('human', 'mouse')
+)
+TFBS_POSITION_INDEX = str(os.getenv("TFBS_POSITION_INDEX", _POSITION_INDEX_EXPORTED)).lower() in ("true", "1", "yes")
+
+# Load the TF count tables and memory-mapped cell-line ID arrays when the
+# app starts, so the first search in a new worker does not pay for them.
+TFBS_PRELOAD = str(os.getenv("TFBS_PRELOAD", True)).lower() in ("true", "1", "yes")
+
+# Identifies the loaded TFBS data release; bump it after reloading the
+# databases or the staticfiles/documents CSVs to invalidate client caches.
+TFBS_DATA_VERSION = os.getenv("TFBS_DATA_VERSION", "1")
+
+# Batch searches allowed to query the database at once per process (size it
+# to the connection pool), and how long a request waits for a free slot
+# before answering 503.
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", 4))
+BATCH_SEARCH_SLOT_TIMEOUT = float(os.getenv("BATCH_SEARCH_SLOT_TIMEOUT", 5))
+# Batch CSV downloads hold a connection for as long as the client reads, so
+# they get their own slots instead of taking the batch search ones.
+BATCH_DOWNLOAD_CONCURRENCY = int(os.getenv("BATCH_DOWNLOAD_CONCURRENCY", 2))
+
+# Shared cache for page and batch-result caching: Redis when REDIS_URL is set
+# (needs the redis package), per-process memory otherwise.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a batch search results page stays cached for DataTables redraws.
+BATCH_RESULTS_CACHE_TIMEOUT = int(os.getenv("BATCH_RESULTS_CACHE_TIMEOUT", 600))
+
+# Render API responses with orjson; keep the browsable API for debugging.
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "home.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
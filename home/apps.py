@@ -3,8 +3,28 @@
 Copyright (c) 2019 - present AppSeed.us
 """
 
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 class HomeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "home"
+
+    def ready(self):
+        if not settings.TFBS_PRELOAD:
+            return
+        # Only processes that serve requests: not other management commands,
+        # and not the runserver autoreloader parent (RUN_MAIN is set in the child)
+        if os.path.basename(sys.argv[0]) == 'manage.py' and sys.argv[1:2] != ['runserver']:
+            return
+        if 'runserver' in sys.argv and '--noreload' not in sys.argv and os.environ.get('RUN_MAIN') != 'true':
+            return
+
+        from .views import preload_search_data
+        try:
+            preload_search_data()
+        except Exception as e:
+            print(f'[Preload] Skipped ({e})')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from home.views import build_cell_tissues_json, cell_tissues_json_path
+
+
+class Command(BaseCommand):
+    help = (
+        'Write staticfiles/documents/cell_tissue_unique_{species}.json, the ready-to-serve '
+        '/api/cell-tissues/ body, from cell_tissue_unique_{species}.csv'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--species', nargs='+', choices=('human', 'mouse'), default=['human', 'mouse'])
+
+    def handle(self, *args, **options):
+        for species in options['species']:
+            json_path = cell_tissues_json_path(species)
+            with open(json_path, 'wb') as f:
+                f.write(build_cell_tissues_json(species))
+            self.stdout.write(self.style.SUCCESS(f'[Cell tissues] Wrote {json_path}'))
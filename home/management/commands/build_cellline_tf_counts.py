@@ -0,0 +1,55 @@
+import csv
+import io
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from home.views import TF_COUNT_COLUMNS, _db_alias, load_tf_count_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild tfbs_name_counts_by_cellline (cell_line, tfbs_type, tfbs -> count) '
+        'from staticfiles/documents/cell_line_TF_count_{species}.csv'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--species', nargs='+', choices=('human', 'mouse'), default=['human', 'mouse'])
+
+    def handle(self, *args, **options):
+        for species in options['species']:
+            db_alias = _db_alias(species, 'mouse')
+            rows = self.count_rows(species)
+            with transaction.atomic(using=db_alias), connections[db_alias].cursor() as cursor:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS tfbs_name_counts_by_cellline (
+                        cell_line text NOT NULL,
+                        tfbs_type text NOT NULL,
+                        tfbs text NOT NULL,
+                        "count" bigint NOT NULL,
+                        PRIMARY KEY (cell_line, tfbs_type, tfbs)
+                    )
+                ''')
+                # Readers see the old rows until the rebuild commits
+                cursor.execute('DELETE FROM tfbs_name_counts_by_cellline')
+                cursor.copy_expert(
+                    'COPY tfbs_name_counts_by_cellline (cell_line, tfbs_type, tfbs, "count") FROM STDIN WITH (FORMAT csv)',
+                    rows,
+                )
+                cursor.execute('ANALYZE tfbs_name_counts_by_cellline')
+            self.stdout.write(self.style.SUCCESS(f'[TF count] Rebuilt tfbs_name_counts_by_cellline on {db_alias}'))
+
+    def count_rows(self, species):
+        """Return the species' count table as COPY-ready CSV, one row per non-zero count."""
+        table = load_tf_count_data(species)
+        cell_tissues = list(table.cell_tissues)
+        tf_names = list(table.tf_names)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for key, counts in zip(table.keys.tolist(), table.counts.tolist()):
+            cell_tissue, tf_name = cell_tissues[key // len(tf_names)], tf_names[key % len(tf_names)]
+            for tfbs_type, column in TF_COUNT_COLUMNS.items():
+                if counts[column]:
+                    writer.writerow([cell_tissue, tfbs_type, tf_name, counts[column]])
+        buffer.seek(0)
+        return buffer
@@ -0,0 +1,29 @@
+# home/renderers.py
+from decimal import Decimal
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+
+def _default(value):
+    # Decimal becomes a float, as in DRF's JSONEncoder; anything else
+    # orjson does not know is rendered as its str()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson for the DataTables API endpoints.
+
+    Decimals are emitted as floats, matching DRF's JSONRenderer; other
+    values orjson does not know natively fall back to str().
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -3,6 +3,281 @@
 Copyright (c) 2019 - present AppSeed.us
 """
 
-from django.test import TestCase
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from home import views
+from home.renderers import ORJSONRenderer
+
+
+class PositionIndexBatchTests(SimpleTestCase):
+    # (start, end, ID) rows of one chromosome, sorted like an exported index
+    index = (
+        np.array([100, 200, 300], dtype=np.int64),
+        np.array([150, 250, 350], dtype=np.int64),
+        np.array([1, 2, 3], dtype=np.int64),
+    )
+
+    def search(self, locations):
+        with mock.patch.object(views, 'load_position_index', return_value=self.index):
+            return views.search_position_index_batch('human', locations, offset=0, limit=25)
+
+    def test_inverted_interval_matches_nothing(self):
+        self.assertEqual(self.search([('chr1', 500, 100)]), ([], 0))
+
+    def test_inverted_interval_does_not_affect_other_lines(self):
+        results, count = self.search([('chr1', 500, 100), ('chr1', 100, 260)])
+        self.assertEqual(count, 2)
+        self.assertEqual([row['ID'] for row in results], [1, 2])
+
+    def test_overlapping_wide_intervals(self):
+        locations = [('chr1', 1, 10**9)] * 1000 + [('chr1', 90, 260), ('chr1', 250, 400)]
+        results, count = self.search(locations)
+        self.assertEqual(count, 3)
+        self.assertEqual([row['ID'] for row in results], [1, 2, 3])
+
+    def test_row_must_fit_an_interval_end(self):
+        # (300, 350) starts inside (290, 340) but ends past it
+        results, count = self.search([('chr1', 100, 260), ('chr1', 290, 340)])
+        self.assertEqual(count, 2)
+        self.assertEqual([row['ID'] for row in results], [1, 2])
+
+
+@override_settings(TFBS_CELL_LINE_COUNT_TABLE=True)
+class CellLineTFCountTests(SimpleTestCase):
+    def setUp(self):
+        views._cell_line_count_table_failed.clear()
+        self.addCleanup(views._cell_line_count_table_failed.clear)
+
+    def test_failed_query_is_not_retried(self):
+        with mock.patch.object(views, 'read_connection', side_effect=RuntimeError('no table')) as read_connection, \
+                mock.patch.object(views, 'sum_tf_counts_from_csv', return_value=7) as from_csv, \
+                self.assertLogs(views.logger, 'WARNING'):
+            for _ in range(2):
+                self.assertEqual(views.sum_cell_line_tf_counts('human', 'human', 'K562', ['CTCF']), 7)
+        self.assertEqual(read_connection.call_count, 1)
+        self.assertEqual(from_csv.call_count, 2)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+
+class FakeConnection:
+    pass
+
+
+@override_settings(TFBS_PREPARED_STATEMENTS=True)
+class ExecutePreparedTests(SimpleTestCase):
+    sql = 'SELECT "ID" FROM "TFBS_position" WHERE "seqnames" = %s AND "start" >= %s'
+
+    def test_placeholders_are_numbered(self):
+        cursor = FakeCursor(FakeConnection())
+        views.execute_prepared(cursor, self.sql, ['chr1', 100])
+        (prepare, _), (execute, params) = cursor.executed
+        self.assertRegex(prepare, r'^PREPARE tfbs_\w+ AS SELECT .* = \$1 AND "start" >= \$2$')
+        self.assertRegex(execute, r'^EXECUTE tfbs_\w+ \(%s, %s\)$')
+        self.assertEqual(params, ['chr1', 100])
+
+    def test_prepared_once_per_connection(self):
+        connection = FakeConnection()
+        first, second, other = FakeCursor(connection), FakeCursor(connection), FakeCursor(FakeConnection())
+        for cursor in (first, second, other):
+            views.execute_prepared(cursor, self.sql, ['chr1', 100])
+        self.assertEqual([sql.split()[0] for sql, _ in first.executed], ['PREPARE', 'EXECUTE'])
+        self.assertEqual([sql.split()[0] for sql, _ in second.executed], ['EXECUTE'])
+        self.assertEqual([sql.split()[0] for sql, _ in other.executed], ['PREPARE', 'EXECUTE'])
+
+    def test_plain_execute_without_params(self):
+        cursor = FakeCursor(FakeConnection())
+        views.execute_prepared(cursor, 'SELECT 1', [])
+        self.assertEqual(cursor.executed, [('SELECT 1', [])])
+
+    @override_settings(TFBS_PREPARED_STATEMENTS=False)
+    def test_plain_execute_when_disabled(self):
+        cursor = FakeCursor(FakeConnection())
+        views.execute_prepared(cursor, self.sql, ['chr1', 100])
+        self.assertEqual(cursor.executed, [(self.sql, ['chr1', 100])])
+
+
+class LocationCursorPagingTests(SimpleTestCase):
+    # chr1 rows with a duplicated (100, 150) region, which pages count once
+    index = (
+        np.array([100, 100, 200, 300, 400, 500], dtype=np.int64),
+        np.array([150, 150, 250, 350, 450, 550], dtype=np.int64),
+        np.array([1, 2, 3, 4, 5, 6], dtype=np.int64),
+    )
+
+    def page(self, **query_params):
+        request = SimpleNamespace(query_params=query_params, GET=query_params)
+        with mock.patch.object(views, 'load_position_index', return_value=self.index):
+            results, count = views.search_by_location('human', 'chr1', 1, 1000, request)
+        self.assertEqual(count, 5)
+        return results
+
+    def ids(self, results):
+        return [row['ID'] for row in results]
+
+    def test_cursor_returns_next_page(self):
+        pages = [self.page(length=2)]
+        while pages[-1]:
+            pages.append(self.page(length=2, cursor=views.encode_page_cursor(pages[-1][-1])))
+        self.assertEqual([self.ids(page) for page in pages], [[1, 3], [4, 5], [6], []])
+
+    def test_cursor_matches_offset_paging(self):
+        first = self.page(start=0, length=2)
+        self.assertEqual(
+            self.ids(self.page(length=2, cursor=views.encode_page_cursor(first[-1]))),
+            self.ids(self.page(start=2, length=2)),
+        )
+
+    def test_malformed_cursor_falls_back_to_offset(self):
+        for cursor in ('not base64!', 'bm90IGpzb24', views.encode_page_cursor({'seqnames': 'chr1', 'start': 'x', 'end': 1})):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.ids(self.page(start=2, length=2, cursor=cursor)), [4, 5])
+
+    def test_cursor_for_another_chromosome_is_ignored(self):
+        cursor = views.encode_page_cursor({'seqnames': 'chr2', 'start': 300, 'end': 350})
+        self.assertEqual(self.ids(self.page(start=2, length=2, cursor=cursor)), [4, 5])
+
+
+class RecordingCursor(FakeCursor):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def fetchall(self):
+        return []
+
+
+@override_settings(TFBS_PREPARED_STATEMENTS=False)
+class TFNameCursorPagingTests(SimpleTestCase):
+    def page_query(self, **query_params):
+        """Return the (sql, params) a CTCF page request runs."""
+        cursor = RecordingCursor(FakeConnection())
+        request = SimpleNamespace(query_params=query_params)
+        with mock.patch.object(views, 'read_connection', return_value=SimpleNamespace(cursor=lambda: cursor)), \
+                mock.patch.object(views, 'get_name_counts', return_value={'CTCF': (3, 2, 1)}):
+            self.assertEqual(views.search_by_tf_name('human', 'CTCF', request), ([], 3))
+        (sql, params), = cursor.executed
+        return ' '.join(sql.split()), params
+
+    def test_cursor_seeks_past_previous_page(self):
+        row = {'ID': 7, 'seqnames': 'chr2', 'start': 300, 'end': 350}
+        sql, params = self.page_query(start=50, length=25, cursor=views.encode_page_cursor(row))
+        self.assertIn('AND (p."seqnames", p."start", p."end") > (%s, %s, %s)', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual(params, ['CTCF', 'CTCF', 'chr2', 300, 350, 25])
+
+    def test_malformed_cursor_falls_back_to_offset(self):
+        for cursor in ('', 'not base64!', 'WzEsIDJd'):
+            with self.subTest(cursor=cursor):
+                sql, params = self.page_query(start=50, length=25, cursor=cursor)
+                self.assertNotIn('> (%s, %s, %s)', sql)
+                self.assertTrue(sql.endswith('OFFSET %s LIMIT %s'))
+                self.assertEqual(params, ['CTCF', 'CTCF', 50, 25])
+
+
+class PageCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        row = {'ID': 7, 'seqnames': 'chr2', 'start': 300, 'end': 350}
+        self.assertEqual(views.decode_page_cursor(views.encode_page_cursor(row)), ('chr2', 300, 350))
+
+    def test_invalid_cursors(self):
+        # empty, bad base64, not JSON, a two-item list, not a list, not ASCII
+        for value in ('', '!!!', 'bm90IGpzb24', 'WzEsIDJd', 'NQ==', 'ü'):
+            with self.subTest(value=value):
+                self.assertIsNone(views.decode_page_cursor(value))
+
+
+class ParseBatchFileTests(SimpleTestCase):
+    cases = [
+        # (file content, expected queries)
+        ('CTCF\nFOXP3\n', ['CTCF', 'FOXP3']),
+        ('\ufeffCTCF\r\nchr1\r\n', ['CTCF', 'chr1']),
+        ('"CTCF"\n"chr1","100","200"\n', ['CTCF', 'chr1,100,200']),
+        ('"FOXP3, isoform 2",x\n', ['FOXP3, isoform 2']),
+        ('CTCF,,\nchr1,100,200,,\n', ['CTCF', 'chr1,100,200']),
+        ('chr1, 100 , 200\n', ['chr1,100,200']),
+        ('chr1,100,200\nFOXP3,x,y\n', ['chr1,100,200', 'FOXP3']),
+        ('chr1,100\nchr1,100,200,300\n', ['chr1', 'chr1']),
+        ('# header\n\n , \nCTCF\n', ['CTCF']),
+        ('', []),
+    ]
+
+    def test_parse_batch_file(self):
+        for content, expected in self.cases:
+            with self.subTest(content=content):
+                self.assertEqual(views.parse_batch_file(content), expected)
+
+
+class TFCountLookupTests(SimpleTestCase):
+    # K562/CTCF, K562/GATA1 and HepG2/GATA1 (the last key) have counts
+    table = views.TFCountTable(
+        cell_tissues={'K562': 0, 'HepG2': 1},
+        tf_names={'CTCF': 0, 'FOXP3': 1, 'GATA1': 2},
+        keys=np.array([0, 2, 5], dtype=np.int64),
+        counts=np.array([[10, 6, 4], [3, 3, 0], [8, 1, 7]], dtype=np.int32),
+    )
+    empty = views.TFCountTable({'K562': 0}, {'CTCF': 0}, np.empty(0, dtype=np.int64), np.empty((0, 3), dtype=np.int32))
+
+    def use(self, table):
+        patcher = mock.patch.dict(views._tf_count_cache, {'human': table})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_tf_count(self):
+        self.use(self.table)
+        cases = [
+            (('K562', 'CTCF', 'all'), 10),
+            (('K562', 'GATA1', 'chip'), 3),
+            (('HepG2', 'GATA1', 'predicted'), 7),
+            (('K562', 'FOXP3', 'all'), 0),
+            (('HepG2', 'CTCF', 'all'), 0),
+            (('HeLa', 'CTCF', 'all'), 0),
+            (('K562', 'SOX2', 'all'), 0),
+            (('K562', 'CTCF', 'other'), 0),
+        ]
+        for args, expected in cases:
+            with self.subTest(args=args):
+                self.assertEqual(views.get_tf_count_from_csv('human', *args), expected)
+
+    def test_sum_tf_counts(self):
+        self.use(self.table)
+        self.assertEqual(views.sum_tf_counts_from_csv('human', 'K562', ['CTCF', 'GATA1', 'CTCF', 'FOXP3']), 13)
+        self.assertEqual(views.sum_tf_counts_from_csv('human', 'HepG2', ['CTCF', 'GATA1'], 'chip'), 1)
+        self.assertEqual(views.sum_tf_counts_from_csv('human', 'HepG2', ['CTCF', 'SOX2']), 0)
+
+    def test_empty_table(self):
+        self.use(self.empty)
+        self.assertEqual(views.get_tf_count_from_csv('human', 'K562', 'CTCF'), 0)
+        self.assertEqual(views.sum_tf_counts_from_csv('human', 'K562', ['CTCF']), 0)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def render(self, data):
+        return json.loads(ORJSONRenderer().render(data))
+
+    def test_decimal_renders_as_float(self):
+        rendered = self.render({'score': Decimal('0.125'), 'scores': [Decimal('2'), Decimal('-1.5')]})
+        self.assertEqual(rendered, {'score': 0.125, 'scores': [2.0, -1.5]})
+        self.assertIsInstance(rendered['scores'][0], float)
+
+    def test_numpy_and_unknown_values(self):
+        rendered = self.render({'ID': np.int64(7), 'ids': np.array([1, 2]), 'other': SimpleNamespace})
+        self.assertEqual(rendered, {'ID': 7, 'ids': [1, 2], 'other': str(SimpleNamespace)})
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
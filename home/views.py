@@ -1,132 +1,534 @@
 from django.shortcuts import render, redirect
-from django.db import connections
+from django.db import close_old_connections, connections, transaction
 from django.conf import settings
-import re, traceback, io, pickle
+import re, traceback, io
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from .serializers import TFBSSerializer
 import csv
-from django.http import HttpResponse
+import numpy as np
+from psycopg2.extensions import AsIs, adapt, register_adapter
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 from django.contrib import messages
 from django.urls import reverse
 from django.http import JsonResponse
+from django.core.cache import cache
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control, cache_page
+from django.views.decorators.http import condition
+import base64
+import hashlib
+import json
+import logging
+import orjson
 import os
+import tempfile
+import threading
+import time
+import warnings
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import namedtuple
+from functools import wraps
+from bisect import bisect_left
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+def adapt_id_array(ids):
+    """
+    Send integer ndarrays (cell-line ID lists) to Postgres as one bigint[]
+    literal, so they can be bound directly as `"ID" = ANY(%s)` parameters.
+    """
+    if ids.dtype.kind not in 'iu':
+        return adapt(ids.tolist())
+    return AsIs("'{%s}'::bigint[]" % ','.join(map(str, ids.tolist())))
+
+register_adapter(np.ndarray, adapt_id_array)
+
+# Species -> database alias; anything but 'human' reads the mouse database
+_db_alias = {'human': 'human'}.get
+
+def read_connection(db_alias):
+    """
+    Connection for read-only queries against a species database, using its
+    replica when one is configured in settings.READ_DATABASE_ALIASES.
+    """
+    return connections[settings.READ_DATABASE_ALIASES.get(db_alias, db_alias)]
 
-# Module-level cache: maps (species, cell_tissue) -> [id, id, ...]
-# Only populated on first access for each (species, cell_tissue) pair.
+# Statement names already PREPAREd on each raw database connection
+_prepared_statements = weakref.WeakKeyDictionary()
+
+def execute_prepared(cursor, sql, params):
+    """
+    Execute `sql` (with %s placeholders) as a server-side prepared statement.
+
+    Each statement is PREPAREd once per database connection under a name
+    derived from its text and afterwards only EXECUTEd, so Postgres parses
+    and plans a query shape once per connection rather than on every call.
+    Falls back to a plain execute when settings.TFBS_PREPARED_STATEMENTS is
+    off (e.g. behind a transaction-mode PgBouncer) and for statements
+    without parameters.
+    """
+    if not settings.TFBS_PREPARED_STATEMENTS or not params:
+        cursor.execute(sql, params)
+        return
+
+    name = 'tfbs_' + hashlib.md5(sql.encode('utf-8')).hexdigest()[:16]
+    prepared = _prepared_statements.setdefault(cursor.connection, set())
+    if name not in prepared:
+        numbers = iter(range(1, len(params) + 1))
+        body = re.sub(r'%s', lambda m: f'${next(numbers)}', sql)
+        cursor.execute(f'PREPARE {name} AS {body}')
+        prepared.add(name)
+    cursor.execute(f'EXECUTE {name} ({", ".join(["%s"] * len(params))})', params)
+
+def pad_to_power_of_two(values, filler=None):
+    """
+    Pad `values` with `filler` up to the next power-of-two length, so a
+    statement with one placeholder per value comes in few enough shapes to
+    be worth preparing. `filler` must match nothing (e.g. NULL).
+    """
+    size = 1
+    while size < len(values):
+        size *= 2
+    return list(values) + [filler] * (size - len(values))
+
+# Columns returned for every TFBS_position row by the list and download
+# endpoints.  All search queries select from this one definition so the row
+# dicts handed to the API never drift from what the SQL projects.
+POSITION_COLUMNS = ('ID', 'seqnames', 'start', 'end')
+_POSITION_SELECT = ', '.join(f'"{c}"' for c in POSITION_COLUMNS)
+_POSITION_SELECT_P = ', '.join(f'p."{c}"' for c in POSITION_COLUMNS)
+# Same columns, one row per region (pair with GROUP BY p."seqnames", p."start", p."end")
+_POSITION_GROUP_SELECT_P = 'MIN(p."ID"), p."seqnames", p."start", p."end"'
+
+def position_row(row):
+    """Build the API dict for one row selected with _POSITION_SELECT(_P)."""
+    row_id, seqnames, start, end = row
+    return {'ID': row_id, 'seqnames': seqnames, 'start': start, 'end': end}
+
+# Module-level cache: maps (species, cell_tissue) -> (version, int64 ndarray of IDs)
+# Only populated on first access for each (species, cell_tissue) pair, and
+# reloaded when cell_line_ids_version() changes.
 _cell_line_ids_cache = {}
 
+def is_safe_file_name(name):
+    """True if `name` (e.g. a cell_line request parameter) can be used as a bare file name."""
+    return bool(name) and '..' not in name and '\x00' not in name and not any(
+        sep in name for sep in (os.sep, os.altsep or os.sep)
+    )
+
+def save_npy_atomic(path, array):
+    """
+    Write `array` to `path` via a temporary file in the same directory and
+    os.replace, so other workers never map a partly written .npy.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.npy.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def cell_line_ids_version(species, cell_tissue):
+    """
+    Modification time of a cell line's ID file (the CSV, or the .npy when
+    only that is deployed); 0 if neither exists.  Cached IDs and ID tables
+    built from an older version are replaced.
+    """
+    if not is_safe_file_name(cell_tissue):
+        return 0
+    base = os.path.join('staticfiles', 'documents', f'cell_lines_ID_{species}', cell_tissue)
+    for path in (f'{base}.csv', f'{base}.npy'):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            continue
+    return 0
+
 def load_cell_line_ids(species, cell_tissue=None):
     """
-    Load the list of TFBS IDs for a given species and cell tissue name.
+    Load the TFBS IDs for a given species and cell tissue name.
 
     Individual files live at:
         staticfiles/documents/cell_lines_ID_{species}/{cell_tissue}.csv
 
-    Each file has a single column named "ID".  Results are cached so each
-    file is read at most once per process.
+    Each file has a single column named "ID".  The first parse also writes
+    the IDs to a sibling {cell_tissue}.npy, which later loads memory-map
+    instead of re-parsing (rebuilt when the CSV is newer).  Results are
+    cached per process until the file's modification time changes.
 
-    Returns a list of integer IDs, or [] if the file does not exist.
+    Returns an int64 ndarray of IDs, empty if the file does not exist or
+    `cell_tissue` is not a plain file name (it comes from the request).
     """
     cache_key = (species, cell_tissue)
-    if cache_key in _cell_line_ids_cache:
-        return _cell_line_ids_cache[cache_key]
+    version = cell_line_ids_version(species, cell_tissue)
+    cached = _cell_line_ids_cache.get(cache_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
 
-    ids = []
-    if cell_tissue:
+    ids = np.empty(0, dtype=np.int64)
+    if is_safe_file_name(cell_tissue):
         csv_path = os.path.join(
             'staticfiles', 'documents',
             f'cell_lines_ID_{species}', f'{cell_tissue}.csv'
         )
-        if os.path.exists(csv_path):
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    raw = row.get('ID', '').strip()
-                    try:
-                        ids.append(int(raw))
-                    except ValueError:
-                        continue
-
-    _cell_line_ids_cache[cache_key] = ids
+        npy_path = os.path.join(
+            'staticfiles', 'documents',
+            f'cell_lines_ID_{species}', f'{cell_tissue}.npy'
+        )
+        csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
+        mapped = False
+        if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= csv_mtime:
+            try:
+                ids = np.load(npy_path, mmap_mode='r')
+                mapped = True
+            except Exception as e:
+                print(f'[Cell line IDs] Could not map {npy_path} ({e}), parsing CSV')
+        if not mapped and os.path.exists(csv_path):
+            try:
+                # Fast path: numpy's C parser over the single ID column
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')  # header-only files
+                    ids = np.loadtxt(csv_path, dtype=np.int64, delimiter=',', skiprows=1, ndmin=1)
+            except ValueError:
+                # Malformed lines: parse row by row, skipping what isn't an ID
+                parsed = []
+                with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                    reader = csv.reader(f)
+                    i_id = next(reader, ['ID']).index('ID')
+                    for row in reader:
+                        try:
+                            parsed.append(int(row[i_id].strip()))
+                        except (IndexError, ValueError):
+                            continue
+                ids = np.array(parsed, dtype=np.int64)
+
+            # Persist as .npy so the next process maps the file instead of parsing
+            if len(ids):
+                try:
+                    save_npy_atomic(npy_path, ids)
+                except Exception as e:
+                    print(f'[Cell line IDs] Warning: could not save {npy_path} ({e})')
+
+    _cell_line_ids_cache[cache_key] = (version, ids)
     return ids
 
-# Module-level cache for TF count data: species -> {(cell_tissue, tf_name): {'all': n, 'chip': n, 'predicted': n}}
+# Module-level cache: (db_alias, species, cell_tissue) -> (version, name of the
+# UNLOGGED table holding that cell line's IDs, None if it could not be built)
+_cell_line_tables = {}
+
+# Cell-line tables whose row count has been checked on each raw database
+# connection.  Postgres empties UNLOGGED tables during crash recovery, which
+# also drops every connection, so a table checked on a live connection stays
+# filled for as long as that connection does.
+_cell_line_tables_checked = weakref.WeakKeyDictionary()
+
+def cell_line_id_table(db_alias, species, cell_tissue, ids):
+    """
+    Return the name of an UNLOGGED table holding the IDs of one cell line,
+    creating and COPYing it on first use.
+
+    The table name includes the ID file's version, so an updated file gets
+    a fresh table.  Tables built from older versions are left in place for
+    queries still using them; drop stale tfbs_allow_* tables out of band.
+    The row count is checked once per connection and the table refilled if
+    it does not hold every ID, e.g. after crash recovery emptied it.
+
+    Returns None when settings.TFBS_CELL_LINE_TABLES is off, when reads go
+    to a replica (unlogged tables are not replicated), or if the table
+    could not be created.
+    """
+    if not settings.TFBS_CELL_LINE_TABLES or db_alias in settings.READ_DATABASE_ALIASES:
+        return None
+
+    cache_key = (db_alias, species, cell_tissue)
+    version = cell_line_ids_version(species, cell_tissue)
+    cached = _cell_line_tables.get(cache_key)
+    if cached is not None and cached[0] == version and cached[1] is None:
+        return None
+
+    table = 'tfbs_allow_' + hashlib.md5(f'{species}:{cell_tissue}:{version}'.encode('utf-8')).hexdigest()[:16]
+    try:
+        with connections[db_alias].cursor() as cursor:
+            checked = _cell_line_tables_checked.setdefault(cursor.connection, set())
+            if table in checked:
+                return table
+            ids = np.unique(ids)
+            with transaction.atomic(using=db_alias):
+                # Serialise the fill across workers
+                cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [table])
+                cursor.execute(f'CREATE UNLOGGED TABLE IF NOT EXISTS "{table}" ("ID" bigint PRIMARY KEY)')
+                cursor.execute(f'SELECT count(*) FROM "{table}"')
+                if cursor.fetchone()[0] != len(ids):
+                    cursor.execute(f'TRUNCATE "{table}"')
+                    rows = '\n'.join(map(str, ids.tolist()))
+                    cursor.copy_expert(f'COPY "{table}" ("ID") FROM STDIN', io.StringIO(rows))
+                    cursor.execute(f'ANALYZE "{table}"')
+            checked.add(table)
+    except Exception as e:
+        logger.warning('[Cell line IDs] Could not build %s for %s (%s), using ID arrays', table, cell_tissue, e)
+        table = None
+
+    _cell_line_tables[cache_key] = (version, table)
+    return table
+
+def cell_line_id_filter(db_alias, species, cell_tissue, ids, column='"ID"'):
+    """
+    SQL predicate and params restricting `column` to a cell line's IDs:
+    a semi-join against its UNLOGGED table when available, otherwise the
+    ID array bound as a single ANY() parameter.
+    """
+    table = cell_line_id_table(db_alias, species, cell_tissue, ids)
+    if table is not None:
+        return f'{column} IN (SELECT "ID" FROM "{table}")', []
+    return f'{column} = ANY(%s)', [ids]
+
+# Per-species cell_tissue + TF_name count table, held column-wise:
+#   cell_tissues / tf_names: name -> int code
+#   keys:   sorted int64 array of cell_tissue code * len(tf_names) + tf code
+#   counts: int32 array of shape (n, 3) aligned with `keys`, with columns
+#           all, chip, predicted
+# keys and counts stay memory-mapped, so every worker looks them up in the
+# shared page cache instead of holding its own copy.
+TFCountTable = namedtuple('TFCountTable', 'cell_tissues tf_names keys counts')
+
+# Column of TFCountTable.counts for each tfbs_type
+TF_COUNT_COLUMNS = {'all': 0, 'chip': 1, 'predicted': 2}
+
+# Arrays persisted for a TFCountTable, one .npy file each
+TF_COUNT_ARRAYS = ('cell_tissues', 'tf_names', 'keys', 'counts')
+
+# Module-level cache for TF count data: species -> TFCountTable
 _tf_count_cache = {}
 
 def load_tf_count_data(species):
     """
-    Load cell_tissue + TF_name -> count mapping.
+    Load the cell_tissue + TF_name -> count table.
 
     Strategy (fastest first):
       1. In-memory cache  — instant, per-process lifetime
-      2. Pickle file      — ~10-50x faster than CSV parsing; auto-rebuilt when CSV is newer
-      3. CSV file         — fallback; result is saved as pickle for next time
+      2. .npy arrays      — staticfiles/documents/cell_line_TF_count_{species}/,
+                            memory-mapped so loading is a page-cache map, not
+                            a parse; auto-rebuilt when CSV is newer
+      3. CSV file         — fallback; result is saved as .npy for next time
     """
     if species in _tf_count_cache:
         return _tf_count_cache[species]
 
     csv_path = os.path.join('staticfiles', 'documents', f'cell_line_TF_count_{species}.csv')
-    pkl_path = os.path.join('staticfiles', 'documents', f'cell_line_TF_count_{species}.pkl')
+    npy_dir = os.path.join('staticfiles', 'documents', f'cell_line_TF_count_{species}')
+    counts_path = os.path.join(npy_dir, 'counts.npy')
 
-    # Try pickle if it exists and is not older than the CSV
-    if os.path.exists(pkl_path):
+    # Try the .npy arrays if they exist and are not older than the CSV
+    if os.path.exists(counts_path):
         csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
-        if os.path.getmtime(pkl_path) >= csv_mtime:
+        if os.path.getmtime(counts_path) >= csv_mtime:
             try:
-                with open(pkl_path, 'rb') as f:
-                    mapping = pickle.load(f)
-                _tf_count_cache[species] = mapping
-                print(f'[TF count] Loaded from pickle: {pkl_path}')
-                return mapping
+                data = {
+                    name: np.load(os.path.join(npy_dir, f'{name}.npy'), mmap_mode='r')
+                    for name in TF_COUNT_ARRAYS
+                }
+                table = TFCountTable(
+                    cell_tissues={name: code for code, name in enumerate(data['cell_tissues'].tolist())},
+                    tf_names={name: code for code, name in enumerate(data['tf_names'].tolist())},
+                    keys=data['keys'],
+                    counts=data['counts'],
+                )
+                _tf_count_cache[species] = table
+                print(f'[TF count] Mapped from npy: {npy_dir}')
+                return table
             except Exception as e:
-                print(f'[TF count] Pickle load failed ({e}), falling back to CSV')
+                print(f'[TF count] npy load failed ({e}), falling back to CSV')
 
-    # Build from CSV
-    mapping = {}
+    # Build from CSV, interning cell tissue and TF names into int codes
+    cell_tissues = {}
+    tf_names = {}
+    rows = {}
+    counts = []
     if os.path.exists(csv_path):
         print(f'[TF count] Loading CSV: {csv_path}')
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            i_ct = header.index('cell_tissue')
+            i_tfbs = header.index('TFBS')
+            i_pred = header.index('predicted_TFBS')
+            i_cnt = header.index('count_of_id')
+            width = len(header)
             for row in reader:
-                # Use `or ''` so that None values (DictReader uses None for
-                # missing/short rows) are treated as empty strings, not crash.
-                cell_tissue = (row.get('cell_tissue') or '').strip()
-                tfbs = (row.get('TFBS') or '').strip()
-                predicted_tfbs = (row.get('predicted_TFBS') or '').strip()
+                # Pad short rows so missing trailing fields read as empty
+                # strings instead of raising IndexError.
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                cell_tissue = row[i_ct].strip()
+                tfbs = row[i_tfbs].strip()
+                predicted_tfbs = row[i_pred].strip()
                 try:
-                    count = int((row.get('count_of_id') or '0').strip())
+                    count = int(row[i_cnt].strip() or '0')
                 except ValueError:
                     continue
 
-                if cell_tissue and tfbs:
-                    key = (cell_tissue, tfbs)
-                    entry = mapping.setdefault(key, {'all': 0, 'chip': 0, 'predicted': 0})
-                    entry['chip'] += count
-                    entry['all'] += count
-
-                if cell_tissue and predicted_tfbs:
-                    key = (cell_tissue, predicted_tfbs)
-                    entry = mapping.setdefault(key, {'all': 0, 'chip': 0, 'predicted': 0})
-                    entry['predicted'] += count
-                    entry['all'] += count
+                for tf_name, column in ((tfbs, 'chip'), (predicted_tfbs, 'predicted')):
+                    if cell_tissue and tf_name:
+                        key = (
+                            cell_tissues.setdefault(cell_tissue, len(cell_tissues)),
+                            tf_names.setdefault(tf_name, len(tf_names)),
+                        )
+                        if key not in rows:
+                            rows[key] = len(counts)
+                            counts.append([0, 0, 0])
+                        entry = counts[rows[key]]
+                        entry[TF_COUNT_COLUMNS[column]] += count
+                        entry[TF_COUNT_COLUMNS['all']] += count
+
+    # Sort rows by combined key so lookups can binary-search
+    codes = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+    keys = codes[:, 0] * len(tf_names) + codes[:, 1]
+    order = np.argsort(keys, kind='stable')
+    table = TFCountTable(
+        cell_tissues=cell_tissues,
+        tf_names=tf_names,
+        keys=keys[order],
+        counts=np.array(counts, dtype=np.int32).reshape(-1, 3)[order],
+    )
 
-        # Persist as pickle so the next startup skips CSV parsing entirely
+    if os.path.exists(csv_path):
+        # Persist as .npy arrays so the next startup maps them instead of parsing
         try:
-            with open(pkl_path, 'wb') as f:
-                pickle.dump(mapping, f, protocol=pickle.HIGHEST_PROTOCOL)
-            print(f'[TF count] Pickle saved: {pkl_path}')
+            arrays = {
+                'cell_tissues': np.array(list(cell_tissues)),
+                'tf_names': np.array(list(tf_names)),
+                'keys': table.keys,
+                'counts': table.counts,
+            }
+            os.makedirs(npy_dir, exist_ok=True)
+            # counts.npy is written last: its mtime marks a complete set
+            for name in TF_COUNT_ARRAYS:
+                save_npy_atomic(os.path.join(npy_dir, f'{name}.npy'), arrays[name])
+            print(f'[TF count] npy saved: {npy_dir}')
         except Exception as e:
-            print(f'[TF count] Warning: could not save pickle ({e})')
+            print(f'[TF count] Warning: could not save npy ({e})')
+
+    _tf_count_cache[species] = table
+    return table
 
-    _tf_count_cache[species] = mapping
-    return mapping
+def preload_search_data(species_list=('human', 'mouse')):
+    """
+    Fill the per-process caches that searches read from disk: the TF count
+    table and every cell-line ID array that already has a .npy sibling
+    (those load as memory maps; CSV-only cell lines still parse on first use).
+    """
+    for species in species_list:
+        load_tf_count_data(species)
+        ids_dir = os.path.join('staticfiles', 'documents', f'cell_lines_ID_{species}')
+        if os.path.isdir(ids_dir):
+            for name in os.listdir(ids_dir):
+                if name.endswith('.npy'):
+                    load_cell_line_ids(species, name[:-len('.npy')])
 
 def get_tf_count_from_csv(species, cell_tissue, tf_name, tfbs_type='all'):
     """Return count from CSV for a given species, cell_tissue, tf_name, and tfbs_type."""
-    mapping = load_tf_count_data(species)
-    counts = mapping.get((cell_tissue, tf_name), {'all': 0, 'chip': 0, 'predicted': 0})
-    return counts.get(tfbs_type, 0)
+    table = load_tf_count_data(species)
+    ct_code = table.cell_tissues.get(cell_tissue)
+    tf_code = table.tf_names.get(tf_name)
+    column = TF_COUNT_COLUMNS.get(tfbs_type)
+    if ct_code is None or tf_code is None or column is None:
+        return 0
+    key = ct_code * len(table.tf_names) + tf_code
+    row = int(np.searchsorted(table.keys, key))
+    if row == len(table.keys) or table.keys[row] != key:
+        return 0
+    return int(table.counts[row, column])
+
+# Seconds a tfbs_name_counts row is reused before it is read again
+NAME_COUNTS_TTL = 3600
+# Entries kept before the cache is cleared wholesale
+NAME_COUNTS_MAX_ENTRIES = 8192
+
+# Module-level cache: (db_alias, tf_name) -> (expires_at, (all, chip, predicted))
+_name_counts_cache = {}
+
+def sum_tf_counts_from_csv(species, cell_tissue, tf_names, tfbs_type='all'):
+    """
+    Return the summed CSV count of several TF names (each counted once) for
+    a species, cell_tissue and tfbs_type, looking all keys up in one
+    vectorised searchsorted.
+    """
+    table = load_tf_count_data(species)
+    ct_code = table.cell_tissues.get(cell_tissue)
+    column = TF_COUNT_COLUMNS.get(tfbs_type)
+    tf_codes = [table.tf_names[name] for name in set(tf_names) if name in table.tf_names]
+    if ct_code is None or column is None or not tf_codes or not len(table.keys):
+        return 0
+    keys = ct_code * len(table.tf_names) + np.array(tf_codes, dtype=np.int64)
+    rows = np.minimum(np.searchsorted(table.keys, keys), len(table.keys) - 1)
+    found = table.keys[rows] == keys
+    return int(table.counts[rows[found], column].sum())
+
+# Database aliases whose tfbs_name_counts_by_cellline query has failed; they
+# use the count arrays until the process restarts
+_cell_line_count_table_failed = set()
+
+def sum_cell_line_tf_counts(db_alias, species, cell_tissue, tf_names, tfbs_type='all'):
+    """
+    Return the summed count of several TF names for one cell line and
+    tfbs_type: a single query on tfbs_name_counts_by_cellline when
+    settings.TFBS_CELL_LINE_COUNT_TABLE is on, the count arrays otherwise
+    (or once that query has failed on `db_alias`).
+    """
+    if settings.TFBS_CELL_LINE_COUNT_TABLE and db_alias not in _cell_line_count_table_failed:
+        try:
+            with read_connection(db_alias).cursor() as cursor:
+                execute_prepared(cursor, """
+                    SELECT COALESCE(SUM("count"), 0)
+                    FROM tfbs_name_counts_by_cellline
+                    WHERE cell_line = %s AND tfbs_type = %s AND tfbs = ANY(%s)
+                """, [cell_tissue, tfbs_type, list(set(tf_names))])
+                return int(cursor.fetchone()[0])
+        except Exception as e:
+            logger.warning('[TF count] Cell-line count table query failed on %s (%s), using count arrays', db_alias, e)
+            _cell_line_count_table_failed.add(db_alias)
+    return sum_tf_counts_from_csv(species, cell_tissue, tf_names, tfbs_type)
+
+def get_name_counts(db_alias, tf_names):
+    """
+    Return {tf_name: (all_count, tfbs_count, predicted_tfbs_count)} from
+    tfbs_name_counts, (0, 0, 0) for names it does not list.
+
+    The table is pre-aggregated and only changes with a data reload, so rows
+    are reused for NAME_COUNTS_TTL seconds; names not cached (or expired)
+    are fetched together in one query.
+    """
+    now = time.monotonic()
+    result = {}
+    missing = []
+    for tf_name in set(tf_names):
+        entry = _name_counts_cache.get((db_alias, tf_name))
+        if entry is not None and entry[0] > now:
+            result[tf_name] = entry[1]
+        else:
+            missing.append(tf_name)
+
+    if missing:
+        with read_connection(db_alias).cursor() as cursor:
+            execute_prepared(cursor, """
+                SELECT tfbs, all_count, tfbs_count, predicted_tfbs_count
+                FROM tfbs_name_counts
+                WHERE tfbs = ANY(%s)
+            """, [missing])
+            fetched = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+        if len(_name_counts_cache) + len(missing) > NAME_COUNTS_MAX_ENTRIES:
+            _name_counts_cache.clear()
+        expires_at = now + NAME_COUNTS_TTL
+        for tf_name in missing:
+            counts = fetched.get(tf_name, (0, 0, 0))
+            _name_counts_cache[(db_alias, tf_name)] = (expires_at, counts)
+            result[tf_name] = counts
+    return result
 
 def _get_name_condition_and_params(tf_name, tfbs_type):
     """Return (condition_sql_fragment, params_list) for TFBS_name filtering."""
@@ -137,6 +539,274 @@ def _get_name_condition_and_params(tf_name, tfbs_type):
     else:
         return '(n."TFBS" = %s OR n."predicted_TFBS" = %s)', [tf_name, tf_name]
 
+def _get_batch_name_condition_and_params(tf_names, tfbs_type):
+    """Return (condition_sql_fragment, params_list) matching any of `tf_names` in TFBS_name."""
+    # Bind the names as one array so every batch size shares one statement
+    if tfbs_type == 'chip':
+        return 'n."TFBS" = ANY(%s)', [tf_names]
+    elif tfbs_type == 'predicted':
+        return 'n."predicted_TFBS" = ANY(%s)', [tf_names]
+    else:
+        return '(n."TFBS" = ANY(%s) OR n."predicted_TFBS" = ANY(%s))', [tf_names, tf_names]
+
+def _batch_locations_join(locations):
+    """
+    Return (with_clause, from_clause, params) joining TFBS_position p
+    against a VALUES list of (chromosome, start, end) locations.
+
+    Chromosome-only locations match any coordinates.  The list is padded
+    with NULL-chromosome rows, which never join, so a bounded number of
+    statement shapes get prepared.  The LATERAL subquery keeps the plan a
+    per-location range scan on the (seqnames, start, end, ID) index rather
+    than a hash join over the whole chromosome.
+    """
+    padded = pad_to_power_of_two(locations, (None, None, None))
+    values = ', '.join(['(%s, %s::bigint, %s::bigint)'] * len(padded))
+    params = [value for location in padded for value in location]
+    with_clause = f'WITH q("seqnames", "start", "end") AS (VALUES {values})'
+    from_clause = f'''q
+        CROSS JOIN LATERAL (
+            SELECT {_POSITION_SELECT}
+            FROM "TFBS_position"
+            WHERE "seqnames" = q."seqnames"
+              AND "start" >= COALESCE(q."start", 0)
+              AND "end" <= COALESCE(q."end", 9223372036854775807)
+        ) p'''
+    return with_clause, from_clause, params
+
+def encode_page_cursor(row):
+    """
+    Build the opaque keyset cursor for the page following `row`.
+
+    The cursor carries the row's (seqnames, start, end) — the same key the
+    result pages are de-duplicated on — so the next page can seek straight
+    past it instead of re-scanning OFFSET rows.
+    """
+    raw = json.dumps([row['seqnames'], row['start'], row['end']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(value):
+    """Return (seqnames, start, end) from a page cursor, or None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        seqnames, start, end = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+        return str(seqnames), int(start), int(end)
+    except (ValueError, TypeError):
+        return None
+
+# Module-level cache: (species, chromosome) -> (file mtime, (starts, ends, ids) or None)
+# Each index holds three int64 arrays for one chromosome of TFBS_position,
+# sorted by (start, end, ID), mapped lazily on first access per chromosome.
+_position_index_cache = {}
+
+def load_position_index(species, chromosome):
+    """
+    Load the position index for one chromosome, if it has been exported.
+
+    The index is the file written by instruction/export_position_index.py:
+        staticfiles/documents/position_index_{species}/{chromosome}.npy
+    a (3, n) int64 array that is memory-mapped, so workers share the pages
+    and nothing is queried.  A region lookup becomes two binary searches
+    instead of a COUNT(*) plus an OFFSET/LIMIT range scan.  The mapping is
+    reopened when the file's mtime changes (a re-export after a data reload).
+
+    Returns (starts, ends, ids), or None when the index is disabled or the
+    chromosome has no exported file (callers then query the database).
+    """
+    if not settings.TFBS_POSITION_INDEX:
+        return None
+
+    npy_path = os.path.join(
+        'staticfiles', 'documents',
+        f'position_index_{species}', f'{chromosome}.npy'
+    )
+    version = os.path.getmtime(npy_path) if os.path.exists(npy_path) else 0
+    cache_key = (species, chromosome)
+    cached = _position_index_cache.get(cache_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = None
+    if version:
+        try:
+            table = np.load(npy_path, mmap_mode='r')
+            index = (table[0], table[1], table[2])
+        except Exception as e:
+            print(f'[Position index] Could not map {npy_path} ({e}), using SQL')
+    _position_index_cache[cache_key] = (version, index)
+    return index
+
+def region_firsts(index, selected):
+    """
+    Keep only the first (lowest ID) of each (start, end) region among the
+    sorted index positions `selected`, like DISTINCT ON in the SQL path.
+
+    The index is ordered by (start, end, ID), so repeats of a region are
+    adjacent and are dropped with one vectorised comparison instead of a
+    seen-set lookup per row.
+    """
+    starts, ends = index[0][selected], index[1][selected]
+    first = np.ones(len(selected), dtype=bool)
+    first[1:] = (starts[1:] != starts[:-1]) | (ends[1:] != ends[:-1])
+    return selected[first]
+
+def index_rows(chromosome, index, selected):
+    """Build API rows for the index positions `selected`."""
+    starts, ends, ids = (column[selected].tolist() for column in index)
+    return [
+        {'ID': row_id, 'seqnames': chromosome, 'start': row_start, 'end': row_end}
+        for row_start, row_end, row_id in zip(starts, ends, ids)
+    ]
+
+def search_position_index(index, chromosome, start, end, offset=0, limit=None, after=None, allowed_ids=None):
+    """
+    Answer a location search from a chromosome's position index.
+
+    Uses the same containment rule as the SQL path ("start" >= start AND
+    "end" <= end; whole chromosome when start/end are None) and returns
+    (results, count) in the same shape as search_by_location.  When `after`
+    is a decoded page cursor, the page starts after that row instead of at
+    `offset`.  `allowed_ids` (a cell line's IDs) restricts the matches.
+    """
+    starts, ends, ids = index
+    if start is None or end is None:
+        selected = np.arange(len(starts))
+    else:
+        # Rows are sorted by start, so every candidate lies in [lo, hi)
+        lo = np.searchsorted(starts, start, side='left')
+        hi = np.searchsorted(starts, end, side='right')
+        selected = lo + np.flatnonzero(ends[lo:hi] <= end)
+    if allowed_ids is not None:
+        selected = selected[np.isin(ids[selected], allowed_ids)]
+    # Count and page over regions, not raw rows
+    selected = region_firsts(index, selected)
+
+    count = len(selected)
+    if limit is not None:
+        if after is not None:
+            # First row whose (start, end) sorts after the cursor
+            lo = np.searchsorted(starts, after[1], side='left')
+            hi = np.searchsorted(starts, after[1], side='right')
+            position = lo + np.searchsorted(ends[lo:hi], after[2], side='right')
+            selected = selected[np.searchsorted(selected, position):][:limit]
+        else:
+            selected = selected[offset:offset + limit]
+
+    return index_rows(chromosome, index, selected), count
+
+def index_rows_in_intervals(starts, ends, intervals):
+    """
+    Return the sorted index positions whose (start, end) lies inside any of
+    the (start, end) `intervals`, using O(len(starts)) memory however many
+    or however overlapping the intervals are.
+
+    Each interval's candidate rows are the [lo, hi) run of rows whose start
+    falls inside it; overlapping runs are merged before being expanded, so
+    every row is examined once.  A candidate is inside some interval exactly
+    when it fits the widest interval starting at or before it, so the end
+    check needs only a running maximum of interval ends.
+    """
+    bounds = np.array(intervals, dtype=np.int64).reshape(-1, 2)
+    bounds = bounds[np.argsort(bounds[:, 0], kind='stable')]
+    lo = np.searchsorted(starts, bounds[:, 0], side='left')
+    # An inverted interval (start > end) has no candidates, as in SQL
+    hi = np.maximum(np.searchsorted(starts, bounds[:, 1], side='right'), lo)
+
+    # Merge the runs: lo is sorted, so a run starts a new group when it
+    # begins past everything reached so far
+    reach = np.maximum.accumulate(hi)
+    first = np.ones(len(lo), dtype=bool)
+    first[1:] = lo[1:] > reach[:-1]
+    group_starts = np.flatnonzero(first)
+    run_lo = lo[group_starts]
+    run_hi = reach[np.append(group_starts[1:] - 1, len(lo) - 1)]
+    lengths = run_hi - run_lo
+    candidates = np.repeat(run_lo - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+
+    widest_end = np.maximum.accumulate(bounds[:, 1])
+    limit = widest_end[np.searchsorted(bounds[:, 0], starts[candidates], side='right') - 1]
+    return candidates[(starts[candidates] <= limit) & (ends[candidates] <= limit)]
+
+def search_position_index_batch(species, locations, offset=0, limit=None, allowed_ids=None):
+    """
+    Answer a batch of location searches from the position index.
+
+    Intervals are grouped by chromosome and each group is resolved in one
+    vectorised pass (index_rows_in_intervals); rows matched by several intervals
+    are counted and returned once, as is each (start, end) region.  Results
+    are ordered by chromosome, then (start, end, ID), and `offset`/`limit`
+    page over that combined order.
+    `allowed_ids` (a cell line's IDs) restricts the matches.
+
+    Returns (results, count), or None when the index is disabled.
+    """
+    by_chromosome = {}
+    for chromosome, start, end in locations:
+        by_chromosome.setdefault(chromosome, []).append((start, end))
+
+    matched = []
+    for chromosome in sorted(by_chromosome):
+        index = load_position_index(species, chromosome)
+        if index is None:
+            return None
+        starts, ends, ids = index
+        intervals = by_chromosome[chromosome]
+        if any(start is None or end is None for start, end in intervals):
+            # A chromosome-only query covers every other interval on it
+            selected = np.arange(len(starts))
+        else:
+            selected = index_rows_in_intervals(starts, ends, intervals)
+        if allowed_ids is not None:
+            selected = selected[np.isin(ids[selected], allowed_ids)]
+        matched.append((chromosome, index, region_firsts(index, selected)))
+
+    count = sum(len(selected) for _, _, selected in matched)
+
+    results = []
+    for chromosome, index, selected in matched:
+        if limit is not None:
+            page = selected[offset:offset + limit]
+            offset = max(0, offset - len(selected))
+            limit -= len(page)
+        else:
+            page = selected
+        results.extend(index_rows(chromosome, index, page))
+        if limit is not None and limit <= 0:
+            break
+    return results, count
+
+def url_etag(request, *args, **kwargs):
+    """
+    ETag for responses fully determined by the URL and the data release
+    (search pages, the TFBS list API, the TF-name autocomplete).
+    """
+    key = f'{settings.TFBS_DATA_VERSION}:{request.get_full_path()}'
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+def etag_condition(etag_func):
+    """
+    condition(etag_func=...) for API views whose error payloads must not be
+    reused: responses marked no-store (see error_response_headers) leave
+    without the ETag, so a browser never revalidates a cached error into a 304.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if 'no-store' in response.get('Cache-Control', ''):
+                del response['ETag']
+            return response
+        return inner
+    return decorator
+
+def error_response_headers(response):
+    """Mark an error payload as not cacheable (and so sent without an ETag by etag_condition)."""
+    add_never_cache_headers(response)
+    return response
+
 def index(request):
     context = {
         'examples': ['Example search: chr1,10000,20000', 'Example search: FOXP3'],
@@ -146,6 +816,9 @@ def index(request):
     }
     return render(request, 'pages/index.html', context)
 
+@cache_control(public=True, max_age=600)
+@condition(etag_func=url_etag)
+@cache_page(60 * 10)
 def search_results(request):
     query = request.GET.get('query', '')
     species = request.GET.get('species', 'human')
@@ -168,6 +841,7 @@ def search_results(request):
     return render(request, 'pages/search_results.html', context)
 
 class TFBSViewSet(viewsets.ViewSet):
+    @method_decorator(etag_condition(url_etag))
     def list(self, request):
         query = request.query_params.get('query', '')
         species = request.query_params.get('species', 'human')
@@ -184,42 +858,41 @@ class TFBSViewSet(viewsets.ViewSet):
                 'data': []
             })
 
-        db_alias = 'human' if species == 'human' else 'mouse'
+        db_alias = _db_alias(species, 'mouse')
 
         try:
             # Determine search method and execute query
-            if is_genomic_location(query):
-                chrom, start, end = parse_genomic_location(query)
+            location = parse_genomic_location(query)
+            if location is not None:
+                chrom, start, end = location
                 results, total_count = search_by_location(db_alias, chrom, start, end, request, cell_line=cell_line)
             else:
                 results, total_count = search_by_tf_name(db_alias, query, request, cell_line=cell_line, tfbs_type=tfbs_type)
 
-            # Add action links to each result (if results aren't empty)
-            for result in results:
-                print("Setting actions for ID:", result.get('ID'))  # Debug
-                result['actions'] = f"/tfbs-details/{result['ID']}/?species={species}"
-
             # Format response for DataTables
-            return Response({
+            response = Response({
                 'draw': draw,
                 'recordsTotal': total_count,
                 'recordsFiltered': total_count,
-                'data': results
+                'data': results,
+                'next_cursor': encode_page_cursor(results[-1]) if results else None
             })
+            patch_cache_control(response, public=True, max_age=600)
+            return response
 
         except Exception as e:
             error_details = traceback.format_exc()
             print(f"Error in TFBSViewSet: {str(e)}")
             print(f"Traceback: {error_details}")
 
-            return Response({
+            return error_response_headers(Response({
                 'draw': draw,
                 'recordsTotal': 0,
                 'recordsFiltered': 0,
                 'data': [],
                 'error': str(e),
                 'details': error_details if settings.DEBUG else "See server logs for details"
-            }, status=status.HTTP_200_OK)  # Return 200 so DataTables can display the error
+            }, status=status.HTTP_200_OK))  # Return 200 so DataTables can display the error
 
 def download_results(request):
     query = request.GET.get('query', '')
@@ -228,541 +901,301 @@ def download_results(request):
     cell_line = request.GET.get('cell_line', '') or None
     tfbs_type = request.GET.get('tfbs_type', '') or 'all'
 
-    db_alias = 'human' if species == 'human' else 'mouse'
-
-    # Use your existing search logic, but fetch ALL results (no pagination)
-    if is_genomic_location(query):
-        chrom, start, end = parse_genomic_location(query)
-        results, _ = search_by_location(db_alias, chrom, start, end, request, no_pagination=True, cell_line=cell_line)
+    db_alias = _db_alias(species, 'mouse')
+
+    # Positions and scores come from one joined query, streamed as read
+    conditions, params = [], []
+    location = parse_genomic_location(query)
+    if location is not None:
+        chrom, start, end = location
+        conditions.append('p."seqnames" = %s')
+        params.append(chrom)
+        if start is not None and end is not None:
+            conditions.append('p."start" >= %s AND p."end" <= %s')
+            params += [start, end]
     else:
-        results, _ = search_by_tf_name(db_alias, query, request, no_pagination=True, cell_line=cell_line, tfbs_type=tfbs_type)
-
+        name_cond, name_params = _get_name_condition_and_params(query, tfbs_type)
+        conditions.append(f'EXISTS (SELECT 1 FROM "TFBS_name" n WHERE n."ID" = p."ID" AND {name_cond})')
+        params += name_params
     # Optionally filter by chromosome
     if chromosome:
-        results = [r for r in results if r.get('seqnames') == chromosome or r.get('chromosome') == chromosome]
-
-    # Get score information for all results
-    if results:
-        id_list = [result['ID'] for result in results]
-        scores_dict = download_gather_scores(id_list, species)
-        
-        # Add score information to each result
-        for result in results:
-            tfbs_id = result['ID']
-            if tfbs_id in scores_dict:
-                result['confident_score'] = scores_dict[tfbs_id]['confident_score']
-                result['important_score'] = scores_dict[tfbs_id]['important_score']
-            else:
-                result['confident_score'] = None
-                result['important_score'] = None
-
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="search_results.csv"'
-    writer = csv.writer(response)
-    if results:
-        # Write header with score columns
-        writer.writerow(['Chromosome', 'Start', 'End', 'ID', 'Confident_Score', 'Important_Score'])
-        for row in results:
-            writer.writerow([
-                row.get('seqnames', ''),
-                row.get('start', ''),
-                row.get('end', ''),
-                row.get('ID', ''),
-                row.get('confident_score', ''),
-                row.get('important_score', '')
-            ])
-    return response
-
-def gather_tfbs_names(pk, species='human'):
+        conditions.append('p."seqnames" = %s')
+        params.append(chromosome)
+    if cell_line:
+        allowed_ids = load_cell_line_ids(species, cell_line)
+        if not len(allowed_ids):
+            return stream_scored_csv(db_alias, [], 'search_results.csv')
+        id_filter, id_params = cell_line_id_filter(db_alias, species, cell_line, allowed_ids, column='p."ID"')
+        conditions.append(id_filter)
+        params += id_params
+
+    scored_query = scored_positions_query(' AND '.join(conditions), params)
+    return stream_scored_csv(db_alias, [scored_query], 'search_results.csv')
+
+class Echo:
+    """File-like object whose write() hands the value back, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+# Rows fetched from the server-side cursor at a time while streaming a CSV download
+DOWNLOAD_CHUNK_SIZE = 5000
+
+# Positions with both scores (MAX over any duplicate score rows), for CSV downloads
+_SCORED_POSITIONS_SQL = """
+    {with_clause}
+    SELECT p."seqnames", p."start", p."end", p."ID", cs."confident_score", si."importance_score"
+    FROM {from_clause}
+    LEFT JOIN LATERAL (
+        SELECT MAX("confident_score") AS "confident_score" FROM "tfbs_confident_score" WHERE "id" = p."ID"
+    ) cs ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT MAX("importance_score") AS "importance_score" FROM "tfbs_importance_score" WHERE "id" = p."ID"
+    ) si ON TRUE
+    WHERE {where}
+    ORDER BY p."seqnames", p."start", p."end", p."ID"
+"""
+
+def scored_positions_query(where, params, with_clause='', from_clause='"TFBS_position" p'):
+    """Return (sql, params) selecting scored positions of TFBS_position p matching `where`."""
+    sql = _SCORED_POSITIONS_SQL.format(with_clause=with_clause, from_clause=from_clause, where=where)
+    return sql, params
+
+class ClosingStream:
+    """Iterator over `iterable` that calls `on_close` once when the response is closed."""
+    def __init__(self, iterable, on_close):
+        self._iterator = iter(iterable)
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        try:
+            if hasattr(self._iterator, 'close'):
+                self._iterator.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+def stream_scored_csv(db_alias, queries, filename, on_close=None):
     """
-    Fetch TFBS and predicted_TFBS for a given TFBS region (by pk) from the TFBS_name table.
-    Returns a dictionary with comma-separated strings of TFBS and predicted_TFBS values.
+    Stream the rows of `queries` (built with scored_positions_query) as a
+    CSV attachment, with their scores, straight from the database.
+
+    Positions and scores come from a single LEFT JOIN per query, read
+    through a server-side cursor DOWNLOAD_CHUNK_SIZE rows at a time, so
+    neither the server nor the client holds the full result set.  Rows
+    repeating the previous region are skipped, matching the de-duplication
+    of the search functions.  `on_close` runs when the response is closed,
+    whether or not it was read.
     """
-    db_alias = 'human' if species == 'human' else 'mouse'
-    from django.db import connections
-    with connections[db_alias].cursor() as cursor:
-        cursor.execute('''
-            SELECT "TFBS", "predicted_TFBS"
-            FROM "TFBS_name"
-            WHERE "ID" = %s
-        ''', [pk])
-        rows = cursor.fetchall()
-        
-        # Initialize lists to store non-None values
-        tfbs_values = []
-        predicted_tfbs_values = []
-        
-        # Process each row
-        for row in rows:
-            tfbs, predicted_tfbs = row
-            if tfbs is not None:
-                tfbs_values.append(tfbs)
-            if predicted_tfbs is not None:
-                predicted_tfbs_values.append(predicted_tfbs)
-        
-        # Convert lists to comma-separated strings, or None if empty
-        return {
-            'tfbs': ', '.join(tfbs_values) if tfbs_values else None,
-            'predicted_tfbs': ', '.join(predicted_tfbs_values) if predicted_tfbs_values else None
-        }
+    def rows():
+        writer = csv.writer(Echo())
+        previous = None
+        for sql, params in queries:
+            with read_connection(db_alias).chunked_cursor() as cursor:
+                cursor.execute(sql, params)
+                while True:
+                    chunk = cursor.fetchmany(DOWNLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if previous is None:
+                        # Header only once there is at least one row
+                        yield writer.writerow(['Chromosome', 'Start', 'End', 'ID', 'Confident_Score', 'Important_Score'])
+                    for row in chunk:
+                        region = row[:3]
+                        if region != previous:
+                            previous = region
+                            yield writer.writerow(row)
+
+    content = rows() if on_close is None else ClosingStream(rows(), on_close)
+    response = StreamingHttpResponse(content, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
-def gather_source_info(pk, species='human'):
+def gather_tfbs_details(pk, species='human'):
     """
-    Fetch cell/tissue information for a given TFBS region (by pk) from the TFBS_source table.
-    Returns a dictionary with cell/tissue information from the single cell_tissue column.
+    Fetch everything shown on the details page for a TFBS region (by pk) in one query:
+    position, TFBS / predicted_TFBS names, cell/tissue sources and both scores.
+    Returns a dictionary of template values, or None if the ID does not exist.
     """
-    db_alias = 'human' if species == 'human' else 'mouse'
-    from django.db import connections
-    with connections[db_alias].cursor() as cursor:
-        cursor.execute('''
-            SELECT "cell_tissue"
-        FROM "TFBS_cell_or_tissue"
-            WHERE "ID" = %s
+    db_alias = _db_alias(species, 'mouse')
+    with read_connection(db_alias).cursor() as cursor:
+        execute_prepared(cursor, '''
+            SELECT p."seqnames", p."start", p."end",
+                (SELECT string_agg("TFBS", ', ') FROM "TFBS_name" WHERE "ID" = p."ID"),
+                (SELECT string_agg("predicted_TFBS", ', ') FROM "TFBS_name" WHERE "ID" = p."ID"),
+                (SELECT string_agg(DISTINCT "cell_tissue", ', ' ORDER BY "cell_tissue")
+                 FROM "TFBS_cell_or_tissue" WHERE "ID" = p."ID"),
+                (SELECT MAX("confident_score") FROM "tfbs_confident_score" WHERE "id" = p."ID"),
+                (SELECT MAX("importance_score") FROM "tfbs_importance_score" WHERE "id" = p."ID")
+            FROM "TFBS_position" p
+            WHERE p."ID" = %s
+            LIMIT 1
         ''', [pk])
-        rows = cursor.fetchall()
-        
-        # Initialize set to store unique values
-        cell_tissue_values = set()
-        
-        # Process each row
-        for row in rows:
-            cell_tissue = row[0]
-            if cell_tissue is not None:
-                cell_tissue_values.add(cell_tissue)
-        
-        # Join all unique values with commas
-        return {
-            'cell_tissue_info': ', '.join(sorted(cell_tissue_values)) if cell_tissue_values else None
-        }
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    # string_agg skips NULLs and returns NULL when nothing is left
+    return {
+        'chr': row[0],
+        'start': row[1],
+        'end': row[2],
+        'tfbs': row[3],
+        'predicted_tfbs': row[4],
+        'cell_tissue_info': row[5],
+        'confident_score': row[6],
+        'important_score': row[7],
+    }
 
-def gather_scores(pk, species='human'):
-    """
-    Fetch confident and important scores for a given TFBS region (by pk) from their respective tables.
-    Returns a dictionary with both scores.
-    """
-    db_alias = 'human' if species == 'human' else 'mouse'
-    from django.db import connections
-    with connections[db_alias].cursor() as cursor:
-        # Get confident score
-        cursor.execute('''
-            SELECT "confident_score"
-            FROM "tfbs_confident_score"
-            WHERE "id" = %s
-        ''', [pk])
-        confident_score = cursor.fetchall()
-        
-        # Get important score
-        cursor.execute('''
-            SELECT "importance_score"
-            FROM "tfbs_importance_score"
-            WHERE "id" = %s
-        ''', [pk])
-        important_score = cursor.fetchall()
-        print(important_score)
-        return {
-            'confident_score': confident_score if confident_score and confident_score[0] is not None else None,
-            'important_score': important_score if important_score and important_score[0] is not None else None
-        }
+# One overlap annotation row; the details template reads it by attribute
+OverlapAnnotation = namedtuple('OverlapAnnotation', 'type chr start end extra')
 
 def get_overlap_annotations(tfbs_id, species='human'):
     """
     Fetch all overlap annotation information for a given TFBS region (by pk) from various annotation tables.
-    Returns a list of dictionaries containing annotation information.
+    All annotation tables are read in a single UNION ALL round trip.
+    Returns a list of OverlapAnnotation tuples.
     """
-    db_alias = 'human' if species == 'human' else 'mouse'
-    from django.db import connections
+    db_alias = _db_alias(species, 'mouse')
     overlap_annotations = []
-    print(db_alias)
-    with connections[db_alias].cursor() as cursor:
-        # 1. Get Enhancer information
-        cursor.execute('''
-            SELECT e."seqnames", e."start", e."end"
-            FROM "TFBS_to_enhancer" te
-            JOIN "Enhancer_GB" e ON te."enhancer_ID" = e."enhancer_ID"
-            WHERE te."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'Enhancer',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ''
-            })
-
-        # 2. Get Promoter information
-        cursor.execute('''
-            SELECT p."seqnames", p."start", p."end"
-            FROM "TFBS_to_promoter" tp
-            JOIN "Promoter" p ON tp."promoter_ID" = p."promoter_ID"
-            WHERE tp."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'Promoter',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ''
-            })
-
-        # 3. Get Histone information
-        cursor.execute('''
-            SELECT h."seqnames", h."start", h."end", h."histone"
-            FROM "TFBS_to_histone" th
-            JOIN "histone" h ON th."histone_ID" = h."histone_ID"
-            WHERE th."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'Histone',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': row[3] if row[3] else ''
-            })
-
-        # 4. Get cCREs information
-        cursor.execute('''
-            SELECT c."seqnames", c."start", c."end"
-            FROM "TFBS_to_cCREs" tc
-            JOIN "cCREs" c ON tc."cCREs_ID" = c."cCREs_ID"
-            WHERE tc."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'cCREs',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ''
-            })
-
-        # 5. Get rE2G information
-        cursor.execute('''
-            SELECT r."seqnames", r."start", r."end", r."gene"
-            FROM "TFBS_to_rE2G" tr
-            JOIN "rE2G" r ON tr."rE2G_ID" = r."rE2G_ID"
-            WHERE tr."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'rE2G',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': row[3] if row[3] else ''
-            })
-
-        # 6. Get TE information
-        cursor.execute('''
-            SELECT t."seqnames", t."start", t."end"
-            FROM "TFBS_to_TE" tt
-            JOIN "TE" t ON tt."TE_ID" = t."TE_ID"
-            WHERE tt."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'TE',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ''
-            })
-
-        # 7. Get GWAS information
-        cursor.execute('''
-            SELECT g."seqnames", g."start", g."end", g."rs_ID"
-            FROM "TFBS_to_GWAS" tg
-            JOIN "GWAS" g ON tg."GWAS_ID" = g."GWAS_ID"
-            WHERE tg."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'GWAS',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': row[3] if row[3] else ''
-            })
-
-        # 8. Get eQTL information
-        cursor.execute('''
-            SELECT e."seqnames", e."start", e."end", e."tissue"
-            FROM "TFBS_to_eQTL" te
-            JOIN "eQTL" e ON te."eQTL_ID" = e."eQTL_ID"
-            WHERE te."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            extra_info = []
-            if row[3]: extra_info.append(f"tissue: {row[3]}")
-            overlap_annotations.append({
-                'type': 'eQTL',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ', '.join(extra_info)
-            })
-
-        # 9. Get Blacklist information
-        cursor.execute('''
-            SELECT b."seqnames", b."start", b."end"
-            FROM "TFBS_to_blacklist" tb
-            JOIN "blacklist" b ON tb."blacklist_ID" = b."blacklist_ID"
-            WHERE tb."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'Blacklist',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ''
-            })
-
-        # 10. Get Cookbook_ChIP information
-        cursor.execute('''
-            SELECT c."seqnames", c."start", c."end", c."TF_name"
-            FROM "TFBS_to_Cookbook_ChIP" tc
-            JOIN "Cookbook_ChIP" c ON tc."Cookbook_ChIP_ID" = c."Cookbook_ChIP_ID"
-            WHERE tc."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'Cookbook_ChIP',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': row[3] if row[3] else ''
-            })
-
-        # 11. Get Cookbook_GHT_SELEX information
-        cursor.execute('''
-            SELECT c."seqnames", c."start", c."end", c."TF_name"
-            FROM "TFBS_to_Cookbook_GHT_SELEX" tc
-            JOIN "Cookbook_GHT_SELEX" c ON tc."Cookbook_GHT_SELEX_ID" = c."Cookbook_GHT_SELEX_ID"
-            WHERE tc."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'Cookbook_GHT_SELEX',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': row[3] if row[3] else ''
-            })
-
-        # 12. Get variable_CpG information
-        cursor.execute('''
-            SELECT v."seqnames", v."start", v."end"
-            FROM "TFBS_to_variable_CpG" tv
-            JOIN "variable_CpG" v ON tv."variable_CpG_ID" = v."variable_CpG_ID"
-            WHERE tv."ID" = %s
-        ''', [tfbs_id])
-        for row in cursor.fetchall():
-            overlap_annotations.append({
-                'type': 'variable_CpG',
-                'chr': row[0],
-                'start': row[1],
-                'end': row[2],
-                'extra': ''
-            })
-        print(overlap_annotations)
+    with read_connection(db_alias).cursor() as cursor:
+        execute_prepared(cursor, _OVERLAP_ANNOTATIONS_SQL, [tfbs_id] * len(OVERLAP_ANNOTATION_SOURCES))
+        for source, chrom, start, end, extra in cursor.fetchall():
+            overlap_annotations.append(OverlapAnnotation(
+                OVERLAP_ANNOTATION_SOURCES[source][0], chrom, start, end, extra or ''
+            ))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Overlap annotations for %s/%s: %r', db_alias, tfbs_id, overlap_annotations)
     return overlap_annotations
 
 def tfbs_details(request, pk):
     species = request.GET.get('species', 'human')
-    region_info = gather_information_chr_start_end(pk, species)
-    tfbs_info = gather_tfbs_names(pk, species)
-    source_info = gather_source_info(pk, species)
-    scores_info = gather_scores(pk, species)
+    details = gather_tfbs_details(pk, species)
+    # Unknown IDs would otherwise run the annotation and proportion
+    # lookups below just to render an empty page.
+    if details is None:
+        raise Http404(f"TFBS {pk} not found")
     overlap_annotations = get_overlap_annotations(pk, species)
     
     # Get proportion information
     proportion_info = get_proportion_info(
-        tfbs_info.get('tfbs'), 
-        tfbs_info.get('predicted_tfbs'), 
-        source_info.get('cell_tissue_info'), 
+        details['tfbs'],
+        details['predicted_tfbs'],
+        details['cell_tissue_info'],
         species
     )
     
     context = {
-        **region_info, 
-        **tfbs_info, 
-        **source_info, 
-        **scores_info, 
+        **details,
         'overlap_annotations': overlap_annotations,
         'proportion_info': proportion_info
     }
     return render(request, 'pages/tfbs_details.html', context)
 
-def gather_information_chr_start_end(pk, species='human'):
-    """
-    Fetch Chr, Start, and End for a given TFBS region (by pk) from the TFBS_position table.
-    Returns a dictionary: {'chr': ..., 'start': ..., 'end': ...}
-    """
-    db_alias = 'human' if species == 'human' else 'mouse'
-    from django.db import connections
-    with connections[db_alias].cursor() as cursor:
-        cursor.execute('''
-            SELECT "seqnames", "start", "end"
-            FROM "TFBS_position"
-            WHERE "ID" = %s
-        ''', [pk])
-        row = cursor.fetchone()
-        if row:
-            return {'chr': row[0], 'start': row[1], 'end': row[2]}
-        else:
-            return {'chr': None, 'start': None, 'end': None}
-
 # Helper functions
-def is_genomic_location(query):
-    # Check for full genomic location (chrN,start,end)
-    pattern = r'^chr\d+,\d+,\d+$'
-    if bool(re.match(pattern, query)):
-        return True
-    # Check for chromosome-only query (chrN)
-    pattern_chr = r'^chr\d+$'
-    return bool(re.match(pattern_chr, query))
+# Full genomic location (chrN,start,end) or chromosome-only (chrN) query
+_GENOMIC_LOCATION_RE = re.compile(r'^(chr\d+)(?:,(\d+),(\d+))?$')
 
 def parse_genomic_location(query):
-    if ',' in query:
-        parts = query.split(',')
-        chromosome = parts[0]
-        start = int(parts[1])
-        end = int(parts[2])
-        return chromosome, start, end
-    else:
-        # For chromosome-only queries
-        return query, None, None
+    """
+    Return (chromosome, start, end) for a genomic location query, with
+    start and end None for chromosome-only queries, or None for anything
+    else (a TF name).
+    """
+    # TF-name queries, the common case, never start with "chr"
+    if not query.startswith('chr'):
+        return None
+    match = _GENOMIC_LOCATION_RE.match(query)
+    if match is None:
+        return None
+    chromosome, start, end = match.groups()
+    if start is None:
+        return chromosome, None, None
+    return chromosome, int(start), int(end)
 
 def search_by_location(db_alias, chromosome, start, end, request, no_pagination=False, cell_line=None):
+    species = 'human' if db_alias == 'human' else 'mouse'
+
     # Resolve allowed IDs from per-cell-line CSV file when filter is active
     allowed_ids = None
     if cell_line:
-        species = 'human' if db_alias == 'human' else 'mouse'
         allowed_ids = load_cell_line_ids(species, cell_line)
         # If no IDs match, return early — no results possible
-        if not allowed_ids:
+        if not len(allowed_ids):
             return [], 0
 
+    if not no_pagination:
+        query_params = getattr(request, 'query_params', request.GET)
+        offset = int(query_params.get('start', 0))
+        limit = int(query_params.get('length', 25))
+        # Keyset cursor from the previous page, only valid for this chromosome
+        after = decode_page_cursor(query_params.get('cursor', ''))
+        if after is not None and after[0] != chromosome:
+            after = None
+
+    # Answer from the in-process index when enabled, filtering by cell line there
+    index = load_position_index(species, chromosome)
+    if index is not None:
+        if no_pagination:
+            return search_position_index(index, chromosome, start, end, allowed_ids=allowed_ids)
+        return search_position_index(index, chromosome, start, end, offset, limit, after=after, allowed_ids=allowed_ids)
+
+    conditions = ['"seqnames" = %s']
+    params = [chromosome]
+    # Chromosome-only searches have no coordinate bounds
+    if start is not None and end is not None:
+        conditions.append('"start" >= %s AND "end" <= %s')
+        params += [start, end]
+    if allowed_ids is not None:
+        id_filter, id_params = cell_line_id_filter(db_alias, species, cell_line, allowed_ids)
+        conditions.append(id_filter)
+        params += id_params
+    where = ' AND '.join(conditions)
+
     try:
-        with connections[db_alias].cursor() as cursor:
-            if not no_pagination:
-                offset = int(getattr(request, 'query_params', request.GET).get('start', 0))
-                limit = int(getattr(request, 'query_params', request.GET).get('length', 25))
+        with read_connection(db_alias).cursor() as cursor:
+            # Count regions, the unit the pages below are de-duplicated on
+            execute_prepared(cursor, f"""
+                SELECT COUNT(*) FROM (
+                    SELECT DISTINCT "seqnames", "start", "end"
+                    FROM "TFBS_position"
+                    WHERE {where}
+                ) regions
+            """, params)
+            count = cursor.fetchone()[0]
 
-            # Chromosome-only search
-            if start is None or end is None:
-                if allowed_ids is not None:
-                    cursor.execute("""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" = %s AND "ID" = ANY(%s)
-                    """, [chromosome, allowed_ids])
-                else:
-                    cursor.execute("""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" = %s
-                    """, [chromosome])
-                count = cursor.fetchone()[0]
-
-                if no_pagination:
-                    if allowed_ids is not None:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "ID" = ANY(%s)
-                            ORDER BY "start"
-                        """, [chromosome, allowed_ids])
-                    else:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s
-                            ORDER BY "start"
-                        """, [chromosome])
-                else:
-                    if allowed_ids is not None:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "ID" = ANY(%s)
-                            ORDER BY "start"
-                            OFFSET %s LIMIT %s
-                        """, [chromosome, allowed_ids, offset, limit])
-                    else:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s
-                            ORDER BY "start"
-                            OFFSET %s LIMIT %s
-                        """, [chromosome, offset, limit])
+            if no_pagination:
+                execute_prepared(cursor, f"""
+                    SELECT DISTINCT ON ("seqnames", "start", "end") {_POSITION_SELECT}
+                    FROM "TFBS_position"
+                    WHERE {where}
+                    ORDER BY "seqnames", "start", "end", "ID"
+                """, params)
+            elif after is not None:
+                # Seek past the previous page instead of scanning OFFSET rows
+                execute_prepared(cursor, f"""
+                    SELECT DISTINCT ON ("seqnames", "start", "end") {_POSITION_SELECT}
+                    FROM "TFBS_position"
+                    WHERE {where} AND ("start", "end") > (%s, %s)
+                    ORDER BY "seqnames", "start", "end", "ID"
+                    LIMIT %s
+                """, params + [after[1], after[2], limit])
             else:
-                # Genomic region search
-                if allowed_ids is not None:
-                    cursor.execute("""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                        AND "ID" = ANY(%s)
-                    """, [chromosome, start, end, allowed_ids])
-                else:
-                    cursor.execute("""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                    """, [chromosome, start, end])
-                count = cursor.fetchone()[0]
-
-                if no_pagination:
-                    if allowed_ids is not None:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                            AND "ID" = ANY(%s)
-                            ORDER BY "start"
-                        """, [chromosome, start, end, allowed_ids])
-                    else:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                            ORDER BY "start"
-                        """, [chromosome, start, end])
-                else:
-                    if allowed_ids is not None:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                            AND "ID" = ANY(%s)
-                            ORDER BY "start"
-                            OFFSET %s LIMIT %s
-                        """, [chromosome, start, end, allowed_ids, offset, limit])
-                    else:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                            ORDER BY "start"
-                            OFFSET %s LIMIT %s
-                        """, [chromosome, start, end, offset, limit])
-
-            columns = [col[0] for col in cursor.description]
-            raw_results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            seen = set()
-            results = []
-            for row in raw_results:
-                key = (row['seqnames'], row['start'], row['end'])
-                if key not in seen:
-                    seen.add(key)
-                    results.append(row)
-            return results, count
+                execute_prepared(cursor, f"""
+                    SELECT DISTINCT ON ("seqnames", "start", "end") {_POSITION_SELECT}
+                    FROM "TFBS_position"
+                    WHERE {where}
+                    ORDER BY "seqnames", "start", "end", "ID"
+                    OFFSET %s LIMIT %s
+                """, params + [offset, limit])
+
+            # DISTINCT ON keeps the lowest ID for each (seqnames, start, end)
+            return [position_row(row) for row in cursor.fetchall()], count
     except Exception as e:
         print(f"Database error in search_by_location: {str(e)}")
         raise
@@ -774,53 +1207,36 @@ def search_by_tf_name(db_alias, tf_name, request, no_pagination=False, cell_line
     allowed_ids = None
     if cell_line:
         allowed_ids = load_cell_line_ids(species, cell_line)
-        if not allowed_ids:
+        if not len(allowed_ids):
             return [], 0
+        id_filter, id_params = cell_line_id_filter(db_alias, species, cell_line, allowed_ids, column='p."ID"')
 
     name_cond, name_params = _get_name_condition_and_params(tf_name, tfbs_type)
 
     try:
-        with connections[db_alias].cursor() as cursor:
+        with read_connection(db_alias).cursor() as cursor:
             if allowed_ids is not None:
                 # Use pre-built CSV count — avoids a full COUNT(*) DB query
                 all_count = get_tf_count_from_csv(species, cell_line, tf_name, tfbs_type)
             else:
-                cursor.execute("""
-                    SELECT all_count, tfbs_count, predicted_tfbs_count
-                    FROM tfbs_name_counts
-                    WHERE tfbs = %s
-                """, [tf_name])
-                count_info = cursor.fetchone()
-                if tfbs_type == 'chip':
-                    all_count = count_info[1] if count_info else 0
-                elif tfbs_type == 'predicted':
-                    all_count = count_info[2] if count_info else 0
-                else:
-                    all_count = count_info[0] if count_info else 0
+                all_count = get_name_counts(db_alias, [tf_name])[tf_name][TF_COUNT_COLUMNS.get(tfbs_type, 0)]
 
             if no_pagination:
                 if allowed_ids is not None:
-                    cursor.execute(f"""
-                        SELECT DISTINCT
-                            p."ID",
-                            p."seqnames",
-                            p."start",
-                            p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
-                        WHERE p."ID" = ANY(%s)
+                        WHERE {id_filter}
                         AND EXISTS (
                             SELECT 1 FROM "TFBS_name" n
                             WHERE n."ID" = p."ID"
                             AND {name_cond}
                         )
-                    """, [allowed_ids] + name_params)
+                        GROUP BY p."seqnames", p."start", p."end"
+                    """, id_params + name_params)
                 else:
-                    cursor.execute(f"""
-                        SELECT DISTINCT
-                            p."ID",
-                            p."seqnames",
-                            p."start",
-                            p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
                         WHERE EXISTS (
                             SELECT 1
@@ -828,33 +1244,38 @@ def search_by_tf_name(db_alias, tf_name, request, no_pagination=False, cell_line
                             WHERE n."ID" = p."ID"
                             AND {name_cond}
                         )
+                        GROUP BY p."seqnames", p."start", p."end"
                     """, name_params)
             else:
                 offset = int(request.query_params.get('start', 0))
                 limit = int(request.query_params.get('length', 25))
+                # Keyset cursor from the previous page: seek past its region
+                # instead of scanning OFFSET rows; both modes share one order
+                after = decode_page_cursor(request.query_params.get('cursor', ''))
+                if after is not None:
+                    seek = 'AND (p."seqnames", p."start", p."end") > (%s, %s, %s)'
+                    page, page_params = 'LIMIT %s', list(after) + [limit]
+                else:
+                    seek = ''
+                    page, page_params = 'OFFSET %s LIMIT %s', [offset, limit]
                 if allowed_ids is not None:
-                    cursor.execute(f"""
-                        SELECT DISTINCT
-                            p."ID",
-                            p."seqnames",
-                            p."start",
-                            p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
-                        WHERE p."ID" = ANY(%s)
+                        WHERE {id_filter}
                         AND EXISTS (
                             SELECT 1 FROM "TFBS_name" n
                             WHERE n."ID" = p."ID"
                             AND {name_cond}
                         )
-                        OFFSET %s LIMIT %s
-                    """, [allowed_ids] + name_params + [offset, limit])
+                        {seek}
+                        GROUP BY p."seqnames", p."start", p."end"
+                        ORDER BY p."seqnames", p."start", p."end"
+                        {page}
+                    """, id_params + name_params + page_params)
                 else:
-                    cursor.execute(f"""
-                        SELECT DISTINCT
-                            p."ID",
-                            p."seqnames",
-                            p."start",
-                            p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
                         WHERE EXISTS (
                             SELECT 1
@@ -862,19 +1283,14 @@ def search_by_tf_name(db_alias, tf_name, request, no_pagination=False, cell_line
                             WHERE n."ID" = p."ID"
                             AND {name_cond}
                         )
-                        OFFSET %s LIMIT %s
-                    """, name_params + [offset, limit])
-
-            columns = [col[0] for col in cursor.description]
-            raw_results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            seen = set()
-            results = []
-            for row in raw_results:
-                key = (row['seqnames'], row['start'], row['end'])
-                if key not in seen:
-                    seen.add(key)
-                    results.append(row)
-            return results, all_count
+                        {seek}
+                        GROUP BY p."seqnames", p."start", p."end"
+                        ORDER BY p."seqnames", p."start", p."end"
+                        {page}
+                    """, name_params + page_params)
+
+            # Rows are already one per (seqnames, start, end), with the lowest ID
+            return [position_row(row) for row in cursor.fetchall()], all_count
     except Exception as e:
         print(f"Database error in search_by_tf_name: {str(e)}")
         raise
@@ -892,103 +1308,83 @@ def batch_search_by_tf_name(db_alias, tf_names, request=None, no_pagination=Fals
     allowed_ids = None
     if cell_line:
         allowed_ids = load_cell_line_ids(species, cell_line)
-        if not allowed_ids:
+        if not len(allowed_ids):
             return [], 0
+        id_filter, id_params = cell_line_id_filter(db_alias, species, cell_line, allowed_ids, column='p."ID"')
 
-    placeholders = ','.join(['%s'] * len(tf_names))
-    # Build the IN-based condition for multiple TF names
-    if tfbs_type == 'chip':
-        batch_name_cond = f'n."TFBS" IN ({placeholders})'
-        batch_name_params = tf_names
-    elif tfbs_type == 'predicted':
-        batch_name_cond = f'n."predicted_TFBS" IN ({placeholders})'
-        batch_name_params = tf_names
-    else:
-        batch_name_cond = f'(n."TFBS" IN ({placeholders}) OR n."predicted_TFBS" IN ({placeholders}))'
-        batch_name_params = tf_names + tf_names
+    batch_name_cond, batch_name_params = _get_batch_name_condition_and_params(tf_names, tfbs_type)
 
     try:
-        with connections[db_alias].cursor() as cursor:
+        with read_connection(db_alias).cursor() as cursor:
             # Get total count
             if allowed_ids is not None:
-                # Use CSV count data — sum across all requested TF names
-                total_count = sum(
-                    get_tf_count_from_csv(species, cell_line, tf_name, tfbs_type)
-                    for tf_name in tf_names
-                )
+                # Precomputed per-cell-line counts, summed across all requested TF names at once
+                total_count = sum_cell_line_tf_counts(db_alias, species, cell_line, tf_names, tfbs_type)
             else:
-                cursor.execute(f"""
-                    SELECT all_count, tfbs_count, predicted_tfbs_count
-                    FROM tfbs_name_counts
-                    WHERE tfbs IN ({placeholders})
-                """, tf_names)
-                rows = cursor.fetchall()
-                if tfbs_type == 'chip':
-                    total_count = sum(r[1] for r in rows) if rows else 0
-                elif tfbs_type == 'predicted':
-                    total_count = sum(r[2] for r in rows) if rows else 0
-                else:
-                    total_count = sum(r[0] for r in rows) if rows else 0
+                name_counts = get_name_counts(db_alias, tf_names)
+                column = TF_COUNT_COLUMNS.get(tfbs_type, 0)
+                total_count = sum(counts[column] for counts in name_counts.values())
 
             if no_pagination:
                 if allowed_ids is not None:
-                    cursor.execute(f"""
-                        SELECT DISTINCT p."ID", p."seqnames", p."start", p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
-                        WHERE p."ID" = ANY(%s)
+                        WHERE {id_filter}
                         AND EXISTS (
                             SELECT 1 FROM "TFBS_name" n
                             WHERE n."ID" = p."ID"
                             AND {batch_name_cond}
                         )
-                    """, [allowed_ids] + batch_name_params)
+                        GROUP BY p."seqnames", p."start", p."end"
+                        ORDER BY p."seqnames", p."start", p."end"
+                    """, id_params + batch_name_params)
                 else:
-                    cursor.execute(f"""
-                        SELECT DISTINCT p."ID", p."seqnames", p."start", p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
                         WHERE EXISTS (
                             SELECT 1 FROM "TFBS_name" n
                             WHERE n."ID" = p."ID"
                             AND {batch_name_cond}
                         )
+                        GROUP BY p."seqnames", p."start", p."end"
+                        ORDER BY p."seqnames", p."start", p."end"
                     """, batch_name_params)
             else:
                 offset = int(getattr(request, 'query_params', request.GET).get('start', 0))
                 limit = int(getattr(request, 'query_params', request.GET).get('length', 25))
                 if allowed_ids is not None:
-                    cursor.execute(f"""
-                        SELECT DISTINCT p."ID", p."seqnames", p."start", p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
-                        WHERE p."ID" = ANY(%s)
+                        WHERE {id_filter}
                         AND EXISTS (
                             SELECT 1 FROM "TFBS_name" n
                             WHERE n."ID" = p."ID"
                             AND {batch_name_cond}
                         )
+                        GROUP BY p."seqnames", p."start", p."end"
+                        ORDER BY p."seqnames", p."start", p."end"
                         OFFSET %s LIMIT %s
-                    """, [allowed_ids] + batch_name_params + [offset, limit])
+                    """, id_params + batch_name_params + [offset, limit])
                 else:
-                    cursor.execute(f"""
-                        SELECT DISTINCT p."ID", p."seqnames", p."start", p."end"
+                    execute_prepared(cursor, f"""
+                        SELECT {_POSITION_GROUP_SELECT_P}
                         FROM "TFBS_position" p
                         WHERE EXISTS (
                             SELECT 1 FROM "TFBS_name" n
                             WHERE n."ID" = p."ID"
                             AND {batch_name_cond}
                         )
+                        GROUP BY p."seqnames", p."start", p."end"
+                        ORDER BY p."seqnames", p."start", p."end"
                         OFFSET %s LIMIT %s
                     """, batch_name_params + [offset, limit])
 
-            columns = [col[0] for col in cursor.description]
-            raw_results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            seen = set()
-            results = []
-            for row in raw_results:
-                key = (row['seqnames'], row['start'], row['end'])
-                if key not in seen:
-                    seen.add(key)
-                    results.append(row)
-            return results, total_count
+            # Rows are already one per (seqnames, start, end), with the lowest ID,
+            # in region order so pages and downloads are stable
+            return [position_row(row) for row in cursor.fetchall()], total_count
 
     except Exception as e:
         print(f"Database error in batch_search_by_tf_name: {str(e)}")
@@ -1002,173 +1398,77 @@ def batch_search_by_location(db_alias, locations, request=None, no_pagination=Fa
     if not locations:
         return [], 0
 
+    species = 'human' if db_alias == 'human' else 'mouse'
+
     # Resolve allowed IDs when cell_line filter is active
     allowed_ids = None
     if cell_line:
-        species = 'human' if db_alias == 'human' else 'mouse'
         allowed_ids = load_cell_line_ids(species, cell_line)
-        if not allowed_ids:
+        if not len(allowed_ids):
             return [], 0
+        id_filter, id_params = cell_line_id_filter(db_alias, species, cell_line, allowed_ids, column='p."ID"')
 
-    print(locations)
-    try:
-        with connections[db_alias].cursor() as cursor:
-            # Get pagination parameters if not no_pagination
-            if not no_pagination and request:
-                offset = int(getattr(request, 'query_params', request.GET).get('start', 0))
-                limit = int(getattr(request, 'query_params', request.GET).get('length', 25))
-            else:
-                offset = 0
-                limit = 25
+    # Get pagination parameters if not no_pagination
+    if not no_pagination and request:
+        offset = int(getattr(request, 'query_params', request.GET).get('start', 0))
+        limit = int(getattr(request, 'query_params', request.GET).get('length', 25))
+    else:
+        offset = 0
+        limit = 25
 
-            # Separate chromosome-only and region searches
-            chr_only_searches = []
-            region_searches = []
+    # Answer from the in-process index when enabled, filtering by cell line there
+    answer = search_position_index_batch(
+        species, locations, offset, None if no_pagination else limit, allowed_ids=allowed_ids
+    )
+    if answer is not None:
+        return answer
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Batch location search on %s: %r', db_alias, locations)
+    # Every location becomes one row of a VALUES list joined against
+    # TFBS_position, so the whole batch is one count and one page query.
+    with_clause, from_clause, values_params = _batch_locations_join(locations)
+    where = f'WHERE {id_filter}' if allowed_ids is not None else ''
+    where_params = id_params if allowed_ids is not None else []
+    matches = f"""
+        {with_clause}
+        SELECT {{select}}
+        FROM {from_clause}
+        {where}
+    """
 
-            for chromosome, start, end in locations:
-                if start is None or end is None:
-                    chr_only_searches.append(chromosome)
-                else:
-                    region_searches.append((chromosome, start, end))
+    try:
+        with read_connection(db_alias).cursor() as cursor:
+            # Count regions, matching the DISTINCT ON pages (overlapping locations count each once)
+            execute_prepared(
+                cursor,
+                'SELECT COUNT(*) FROM (' + matches.format(select='DISTINCT p."seqnames", p."start", p."end"') + ') regions',
+                values_params + where_params,
+            )
+            total_count = cursor.fetchone()[0]
+
+            query = matches.format(select=f'DISTINCT ON (p."seqnames", p."start", p."end") {_POSITION_SELECT_P}') + """
+                ORDER BY p."seqnames", p."start", p."end", p."ID"
+            """
+            if no_pagination:
+                execute_prepared(cursor, query, values_params + where_params)
+            else:
+                execute_prepared(cursor, query + 'OFFSET %s LIMIT %s', values_params + where_params + [offset, limit])
 
-            # Get total count
-            total_count = 0
+            # DISTINCT ON keeps the lowest ID for each (seqnames, start, end)
+            return [position_row(row) for row in cursor.fetchall()], total_count
 
-            # Count chromosome-only searches
-            if chr_only_searches:
-                chr_placeholders = ','.join(['%s'] * len(chr_only_searches))
-                if allowed_ids is not None:
-                    cursor.execute(f"""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" IN ({chr_placeholders}) AND "ID" = ANY(%s)
-                    """, chr_only_searches + [allowed_ids])
-                else:
-                    cursor.execute(f"""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" IN ({chr_placeholders})
-                    """, chr_only_searches)
-                chr_count = cursor.fetchone()[0]
-                total_count += chr_count
-
-            # Count region searches
-            for chromosome, start, end in region_searches:
-                if allowed_ids is not None:
-                    cursor.execute("""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s AND "ID" = ANY(%s)
-                    """, [chromosome, start, end, allowed_ids])
-                else:
-                    cursor.execute("""
-                        SELECT COUNT(*)
-                        FROM "TFBS_position"
-                        WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                    """, [chromosome, start, end])
-                region_count = cursor.fetchone()[0]
-                total_count += region_count
-
-            # Get results
-            all_results = []
-
-            # Handle chromosome-only searches
-            if chr_only_searches:
-                chr_placeholders = ','.join(['%s'] * len(chr_only_searches))
-                if no_pagination:
-                    if allowed_ids is not None:
-                        cursor.execute(f"""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" IN ({chr_placeholders}) AND "ID" = ANY(%s)
-                            ORDER BY "seqnames", "start"
-                        """, chr_only_searches + [allowed_ids])
-                    else:
-                        cursor.execute(f"""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" IN ({chr_placeholders})
-                            ORDER BY "seqnames", "start"
-                        """, chr_only_searches)
-                else:
-                    if allowed_ids is not None:
-                        cursor.execute(f"""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" IN ({chr_placeholders}) AND "ID" = ANY(%s)
-                            ORDER BY "seqnames", "start"
-                            OFFSET %s LIMIT %s
-                        """, chr_only_searches + [allowed_ids, offset, limit])
-                    else:
-                        cursor.execute(f"""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" IN ({chr_placeholders})
-                            ORDER BY "seqnames", "start"
-                            OFFSET %s LIMIT %s
-                        """, chr_only_searches + [offset, limit])
-
-                columns = [col[0] for col in cursor.description]
-                chr_results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                all_results.extend(chr_results)
-
-            # Handle region searches
-            for chromosome, start, end in region_searches:
-                if no_pagination:
-                    if allowed_ids is not None:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s AND "ID" = ANY(%s)
-                            ORDER BY "start"
-                        """, [chromosome, start, end, allowed_ids])
-                    else:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                            ORDER BY "start"
-                        """, [chromosome, start, end])
-                else:
-                    if allowed_ids is not None:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s AND "ID" = ANY(%s)
-                            ORDER BY "start"
-                            OFFSET %s LIMIT %s
-                        """, [chromosome, start, end, allowed_ids, offset, limit])
-                    else:
-                        cursor.execute("""
-                            SELECT "ID", "seqnames", "start", "end"
-                            FROM "TFBS_position"
-                            WHERE "seqnames" = %s AND "start" >= %s AND "end" <= %s
-                            ORDER BY "start"
-                            OFFSET %s LIMIT %s
-                        """, [chromosome, start, end, offset, limit])
-                
-                columns = [col[0] for col in cursor.description]
-                region_results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                all_results.extend(region_results)
-            
-            # Remove duplicates from combined results
-            seen = set()
-            results = []
-            for row in all_results:
-                key = (row['seqnames'], row['start'], row['end'])
-                if key not in seen:
-                    seen.add(key)
-                    results.append(row)
-            
-            return results, total_count
-            
     except Exception as e:
         print(f"Database error in batch_search_by_location: {str(e)}")
         raise
 
+@cache_control(public=True)
+@cache_page(60 * 60)
 def evaluation_metrics(request):
     """
     View function for the evaluation metrics explanation page.
+    The page is static, so the rendered response is cached server-side and
+    may be reused by browsers and proxies for an hour.
     """
     return render(request, 'pages/evaluation_metrics.html')
 
@@ -1199,12 +1499,13 @@ def batch_search(request):
                 messages.error(request, 'No valid search terms found in the file.')
                 return redirect('index')
             
-            if len(queries) > 1000:  # Limit number of queries
-                messages.error(request, 'Too many search terms. Please limit to 1000 queries per file.')
+            if len(queries) > MAX_BATCH_QUERIES:  # Limit number of queries
+                messages.error(request, f'Too many search terms. Please limit to {MAX_BATCH_QUERIES} queries per file.')
                 return redirect('index')
             
-            # Store file content in session for batch processing
+            # Store file content and its parsed queries in session for batch processing
             request.session['batch_file_content'] = file_content
+            request.session['batch_queries'] = queries
             
             # Process batch search and redirect to results
             redirect_url = f"{reverse('batch_results')}?species={species}&query_count={len(queries)}"
@@ -1221,9 +1522,14 @@ def batch_search(request):
     
     return redirect('index')
 
+@cache_control(public=True, max_age=600)
+@condition(etag_func=url_etag)
+@cache_page(60 * 10)
 def batch_results(request):
     """
     Display batch search results page.
+    The page is only a shell keyed by its query string (rows are fetched
+    from the batch API), so the rendered HTML is cached like search/.
     """
     species = request.GET.get('species', 'human')
     query_count = request.GET.get('query_count', 0)
@@ -1244,6 +1550,134 @@ def batch_results(request):
     }
     return render(request, 'pages/batch_results.html', context)
 
+# Hard cap on search terms per batch file; larger batches are rejected up front
+MAX_BATCH_QUERIES = 1000
+
+# Bounds how many batch searches hit the database at once (see settings)
+_batch_slots = threading.BoundedSemaphore(settings.BATCH_SEARCH_CONCURRENCY)
+# Separate slots for streaming batch downloads, held until the response closes,
+# so slow downloads never make the batch results pages wait
+_batch_download_slots = threading.BoundedSemaphore(settings.BATCH_DOWNLOAD_CONCURRENCY)
+
+# In-flight batch jobs: job key -> Future shared by identical concurrent requests
+_batch_inflight = {}
+_batch_inflight_lock = threading.Lock()
+
+class BatchSearchBusy(Exception):
+    """Raised when no batch search slot frees up within BATCH_SEARCH_SLOT_TIMEOUT."""
+
+def batch_job_key(request, file_content, *params):
+    """
+    Identify a batch job by session, file content and the parameters that
+    shape its result, so retried submissions map onto the same job.
+    """
+    digest = hashlib.blake2b(file_content.encode('utf-8'), digest_size=16)
+    digest.update(repr((request.session.session_key,) + params).encode('utf-8'))
+    return digest.hexdigest()
+
+def batch_results_cache_key(file_content, *params):
+    """
+    Cache key for a batch results page: the file content, the parameters
+    that shape the page and the data release, independent of the session.
+    """
+    digest = hashlib.blake2b(file_content.encode('utf-8'), digest_size=16)
+    digest.update(repr(params + (settings.TFBS_DATA_VERSION,)).encode('utf-8'))
+    return f'batch-results:{digest.hexdigest()}'
+
+def run_single_flight(key, compute):
+    """
+    Run compute() once per key at a time; concurrent callers with the same
+    key wait for and share the in-flight result instead of repeating it.
+    """
+    with _batch_inflight_lock:
+        future = _batch_inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _batch_inflight[key] = Future()
+
+    if not leader:
+        return future.result()
+
+    try:
+        future.set_result(compute())
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        with _batch_inflight_lock:
+            del _batch_inflight[key]
+    return future.result()
+
+def split_batch_queries(queries):
+    """Split batch queries into (tf_names, locations), locations as (chrom, start, end)."""
+    tf_names = []
+    locations = []
+
+    for query in queries:
+        location = parse_genomic_location(query)
+        if location is not None:
+            locations.append(location)
+        else:
+            tf_names.append(query)
+    return tf_names, locations
+
+# Pool threads for the location half of batch searches; at most one per batch slot
+_batch_executor = ThreadPoolExecutor(max_workers=settings.BATCH_SEARCH_CONCURRENCY, thread_name_prefix='batch-search')
+
+def run_with_thread_connections(func, *args, **kwargs):
+    """
+    Call func on a pool thread, recycling that thread's database connections
+    around the call the way Django does around a request.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+def run_batch_search(db_alias, queries, request, no_pagination=False, cell_line=None, tfbs_type='all'):
+    """
+    Split batch queries into TF names and genomic locations and run both
+    batch searches while holding one of the bounded batch slots.
+    Returns (results, total_count).
+    """
+    tf_names, locations = split_batch_queries(queries)
+
+    if not _batch_slots.acquire(timeout=settings.BATCH_SEARCH_SLOT_TIMEOUT):
+        raise BatchSearchBusy("Too many batch searches are running. Please try again shortly.")
+
+    try:
+        all_results = []
+        total_count = 0
+
+        # The two halves are independent: with both present, the location
+        # search runs on a pool thread (and its own connection) meanwhile
+        location_future = None
+        if tf_names and locations:
+            location_future = _batch_executor.submit(
+                run_with_thread_connections, batch_search_by_location,
+                db_alias, locations, request, no_pagination=no_pagination, cell_line=cell_line
+            )
+
+        # Process TF names in batch
+        if tf_names:
+            tf_results, tf_total_count = batch_search_by_tf_name(db_alias, tf_names, request, no_pagination=no_pagination, cell_line=cell_line, tfbs_type=tfbs_type)
+            total_count += tf_total_count
+            all_results.extend(tf_results)
+
+        # Process genomic locations in batch
+        if location_future is not None:
+            location_results, location_total_count = location_future.result()
+            total_count += location_total_count
+            all_results.extend(location_results)
+        elif locations:
+            location_results, location_total_count = batch_search_by_location(db_alias, locations, request, no_pagination=no_pagination, cell_line=cell_line)
+            total_count += location_total_count
+            all_results.extend(location_results)
+    finally:
+        _batch_slots.release()
+
+    return all_results, total_count
+
 class BatchTFBSViewSet(viewsets.ViewSet):
     """
     API endpoint for batch search processing.
@@ -1264,42 +1698,31 @@ class BatchTFBSViewSet(viewsets.ViewSet):
                 'data': []
             })
 
-        db_alias = 'human' if species == 'human' else 'mouse'
+        db_alias = _db_alias(species, 'mouse')
 
         try:
             # Parse queries and execute batch search
-            queries = parse_batch_file(file_content)
-
-            # Separate TF names and genomic locations
-            tf_names = []
-            locations = []
-
-            for query in queries:
-                if is_genomic_location(query):
-                    chrom, start, end = parse_genomic_location(query)
-                    locations.append((chrom, start, end))
-                else:
-                    tf_names.append(query)
-
-            # Execute batch searches (paginated)
-            all_results = []
-            total_count = 0
-
-            # Process TF names in batch
-            if tf_names:
-                tf_results, tf_total_count = batch_search_by_tf_name(db_alias, tf_names, request, no_pagination=False, cell_line=cell_line, tfbs_type=tfbs_type)
-                total_count += tf_total_count
-                for result in tf_results:
-                    result['actions'] = f"/tfbs-details/{result['ID']}/?species={species}"
-                    all_results.append(result)
-
-            # Process genomic locations in batch
-            if locations:
-                location_results, location_total_count = batch_search_by_location(db_alias, locations, request, no_pagination=False, cell_line=cell_line)
-                total_count += location_total_count
-                for result in location_results:
-                    result['actions'] = f"/tfbs-details/{result['ID']}/?species={species}"
-                    all_results.append(result)
+            queries = batch_session_queries(request, file_content)
+            if len(queries) > MAX_BATCH_QUERIES:
+                return Response({
+                    'draw': draw,
+                    'recordsTotal': 0,
+                    'recordsFiltered': 0,
+                    'data': [],
+                    'error': f'Too many search terms. Please limit to {MAX_BATCH_QUERIES} queries per file.'
+                }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            # Execute batch searches (paginated); pages are cached for redraws
+            # and identical in-flight requests share one run
+            start, length = request.query_params.get('start'), request.query_params.get('length')
+            key = batch_job_key(request, file_content, species, cell_line, tfbs_type, start, length)
+            all_results, total_count = cache.get_or_set(
+                batch_results_cache_key(file_content, species, cell_line, tfbs_type, start, length),
+                lambda: run_single_flight(
+                    key, lambda: run_batch_search(db_alias, queries, request, no_pagination=False, cell_line=cell_line, tfbs_type=tfbs_type)
+                ),
+                timeout=settings.BATCH_RESULTS_CACHE_TIMEOUT,
+            )
             
             # Format response for DataTables
             return Response({
@@ -1309,6 +1732,15 @@ class BatchTFBSViewSet(viewsets.ViewSet):
                 'data': all_results
             })
             
+        except BatchSearchBusy as e:
+            return Response({
+                'draw': draw,
+                'recordsTotal': 0,
+                'recordsFiltered': 0,
+                'data': [],
+                'error': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
         except Exception as e:
             error_details = traceback.format_exc()
             print(f"Error in BatchTFBSViewSet: {str(e)}")
@@ -1329,91 +1761,54 @@ def parse_batch_file(file_content):
     Supports both CSV and plain text formats.
     """
     queries = []
-    
-    # Remove UTF-8 BOM if present
-    if file_content.startswith('\ufeff'):
-        file_content = file_content[1:]
-    
-    lines = file_content.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line or line.startswith('#'):  # Skip empty lines and comments
+
+    # Remove UTF-8 BOM if present; csv handles quoting and \r\n line ends
+    reader = csv.reader(io.StringIO(file_content.lstrip('\ufeff'), newline=''))
+
+    for row in reader:
+        # Drop trailing empty fields (trailing commas)
+        while row and not row[-1].strip():
+            row.pop()
+        if not row:  # Skip empty lines
             continue
-        
-        # Clean up the line (remove any remaining BOM or special characters)
-        if line:
-            # Remove any leading/trailing whitespace and special characters
-            clean_line = line.strip()
-            # Remove any remaining BOM characters
-            if clean_line.startswith('\ufeff'):
-                clean_line = clean_line[1:].strip()
-            
-            # Remove trailing commas
-            clean_line = clean_line.rstrip(',')
-            
-            if clean_line:  # Only process non-empty lines
-                # Check if this is a genomic location first (after cleaning)
-                if is_genomic_location(clean_line):
-                    # It's a genomic location, use as-is
-                    queries.append(clean_line)
-                elif ',' in clean_line:
-                    # It's CSV format, take first column
-                    parts = clean_line.split(',')
-                    csv_query = parts[0].strip()
-                    if csv_query:
-                        queries.append(csv_query)
-                else:
-                    # It's a plain text query
-                    queries.append(clean_line)
-    
-    print(queries)
+
+        first = row[0].strip()
+        if first.startswith('#'):  # Skip comments
+            continue
+
+        # A three-field row may be a genomic location (chrN,start,end)
+        if len(row) == 3:
+            location = ','.join(field.strip() for field in row)
+            if parse_genomic_location(location) is not None:
+                queries.append(location)
+                continue
+
+        # Otherwise the first column is a TF name or chromosome
+        if first:
+            queries.append(first)
+
     return queries
 
-def download_gather_scores(id_list, species='human'):
+def batch_session_queries(request, file_content):
     """
-    Fetch confident and important scores for a list of TFBS regions (by IDs).
-    Returns a dictionary mapping ID to scores.
+    Return the queries of the session's batch file: parsed once at upload
+    and kept in the session, so DataTables redraws and the download do not
+    re-parse the file.
     """
-    db_alias = 'human' if species == 'human' else 'mouse'
-    from django.db import connections
-    scores_dict = {}
-    
-    with connections[db_alias].cursor() as cursor:
-        # Get confident scores for all IDs
-        if id_list:
-            placeholders = ','.join(['%s'] * len(id_list))
-            cursor.execute(f'''
-                SELECT "id", "confident_score"
-                FROM "tfbs_confident_score"
-                WHERE "id" IN ({placeholders})
-            ''', id_list)
-            confident_scores = cursor.fetchall()
-            
-            # Get important scores for all IDs
-            cursor.execute(f'''
-                SELECT "id", "importance_score"
-                FROM "tfbs_importance_score"
-                WHERE "id" IN ({placeholders})
-            ''', id_list)
-            important_scores = cursor.fetchall()
-            
-            # Create a dictionary to store scores by ID
-            confident_dict = {row[0]: row[1] for row in confident_scores}
-            important_dict = {row[0]: row[1] for row in important_scores}
-            
-            # Combine scores for each ID
-            for tfbs_id in id_list:
-                scores_dict[tfbs_id] = {
-                    'confident_score': confident_dict.get(tfbs_id),
-                    'important_score': important_dict.get(tfbs_id)
-                }
-    
-    return scores_dict
+    queries = request.session.get('batch_queries')
+    if queries is None:
+        # Sessions from before the parsed queries were stored
+        queries = parse_batch_file(file_content)
+        request.session['batch_queries'] = queries
+    return queries
 
 def download_batch_results(request):
     """
     Download batch search results as CSV.
+
+    TF-name and location hits are streamed with their scores straight from
+    the database; a batch download slot (separate from the search slots)
+    is held until the response is closed.
     """
     file_content = request.session.get('batch_file_content', '')
     species = request.GET.get('species', 'human')
@@ -1423,74 +1818,87 @@ def download_batch_results(request):
     if not file_content:
         return HttpResponse("No batch search data available", status=400)
 
-    db_alias = 'human' if species == 'human' else 'mouse'
+    db_alias = _db_alias(species, 'mouse')
 
     try:
-        # Parse queries and execute batch search (no pagination for downloads)
-        queries = parse_batch_file(file_content)
-
-        # Separate TF names and genomic locations
-        tf_names = []
-        locations = []
-
-        for query in queries:
-            if is_genomic_location(query):
-                chrom, start, end = parse_genomic_location(query)
-                locations.append((chrom, start, end))
-            else:
-                tf_names.append(query)
+        queries = batch_session_queries(request, file_content)
+        if len(queries) > MAX_BATCH_QUERIES:
+            return HttpResponse(f"Too many search terms. Please limit to {MAX_BATCH_QUERIES} queries per file.", status=413)
+        tf_names, locations = split_batch_queries(queries)
+
+        conditions, params = [], []
+        if cell_line:
+            allowed_ids = load_cell_line_ids(species, cell_line)
+            if not len(allowed_ids):
+                return stream_scored_csv(db_alias, [], 'batch_search_results.csv')
+            id_filter, id_params = cell_line_id_filter(db_alias, species, cell_line, allowed_ids, column='p."ID"')
+            conditions.append(id_filter)
+            params += id_params
+
+        scored_queries = []
+        if tf_names:
+            name_cond, name_params = _get_batch_name_condition_and_params(tf_names, tfbs_type)
+            scored_queries.append(scored_positions_query(
+                ' AND '.join([f'EXISTS (SELECT 1 FROM "TFBS_name" n WHERE n."ID" = p."ID" AND {name_cond})'] + conditions),
+                name_params + params
+            ))
+        if locations:
+            with_clause, from_clause, values_params = _batch_locations_join(locations)
+            scored_queries.append(scored_positions_query(
+                ' AND '.join(conditions) or 'TRUE', values_params + params,
+                with_clause=with_clause, from_clause=from_clause
+            ))
 
-        # Execute batch searches (no pagination)
-        all_results = []
+        if not _batch_download_slots.acquire(timeout=settings.BATCH_SEARCH_SLOT_TIMEOUT):
+            raise BatchSearchBusy("Too many batch downloads are running. Please try again shortly.")
+        return stream_scored_csv(db_alias, scored_queries, 'batch_search_results.csv', on_close=_batch_download_slots.release)
 
-        # Process TF names in batch
-        if tf_names:
-            tf_results, _ = batch_search_by_tf_name(db_alias, tf_names, request, no_pagination=True, cell_line=cell_line, tfbs_type=tfbs_type)
-            all_results.extend(tf_results)
+    except BatchSearchBusy as e:
+        return HttpResponse(str(e), status=503)
 
-        # Process genomic locations in batch
-        if locations:
-            location_results, _ = batch_search_by_location(db_alias, locations, request, no_pagination=True, cell_line=cell_line)
-            all_results.extend(location_results)
-        
-        # Get score information for all results
-        if all_results:
-            id_list = [result['ID'] for result in all_results]
-            scores_dict = download_gather_scores(id_list, species)
-            
-            # Add score information to each result
-            for result in all_results:
-                tfbs_id = result['ID']
-                if tfbs_id in scores_dict:
-                    result['confident_score'] = scores_dict[tfbs_id]['confident_score']
-                    result['important_score'] = scores_dict[tfbs_id]['important_score']
-                else:
-                    result['confident_score'] = None
-                    result['important_score'] = None
-        
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="batch_search_results.csv"'
-        writer = csv.writer(response)
-        
-        if all_results:
-            # Write header with score columns
-            writer.writerow(['Chromosome', 'Start', 'End', 'ID', 'Confident_Score', 'Important_Score'])
-            for row in all_results:
-                writer.writerow([
-                    row.get('seqnames', ''),
-                    row.get('start', ''),
-                    row.get('end', ''),
-                    row.get('ID', ''),
-                    row.get('confident_score', ''),
-                    row.get('important_score', '')
-                ])
-        
-        return response
-        
     except Exception as e:
         return HttpResponse(f"Error generating CSV: {str(e)}", status=500)
 
+# Autocomplete name list: names / lowered in name order, the lowered names
+# sorted (prefix_keys) with their names (prefix_names) for prefix lookups, and
+# the ready-to-send response body for an empty query (first_json)
+TFNameIndex = namedtuple('TFNameIndex', 'names lowered prefix_keys prefix_names first_json')
+
+# Module-level cache: species -> TFNameIndex
+_tf_names_cache = {}
+
+def load_tf_names(species):
+    """
+    Load every distinct TF name in tfbs_name_counts for a species.
+
+    The autocomplete endpoint filters this list in memory, so the table is
+    scanned once per process instead of on every keystroke.
+    """
+    if species in _tf_names_cache:
+        return _tf_names_cache[species]
+
+    db_alias = _db_alias(species, 'mouse')
+    with read_connection(db_alias).cursor() as cursor:
+        cursor.execute('''
+            SELECT DISTINCT "tfbs"
+            FROM "tfbs_name_counts"
+            ORDER BY "tfbs"
+        ''')
+        names = tuple(row[0] for row in cursor.fetchall() if row[0])
+
+    lowered = tuple(name.lower() for name in names)
+    by_lowered = sorted(zip(lowered, names))
+    entry = TFNameIndex(
+        names=names,
+        lowered=lowered,
+        prefix_keys=tuple(key for key, _ in by_lowered),
+        prefix_names=tuple(name for _, name in by_lowered),
+        first_json=orjson.dumps({'success': True, 'tf_names': names[:20]}),
+    )
+    _tf_names_cache[species] = entry
+    return entry
+
+@etag_condition(url_etag)
 def get_all_tf_names(request):
     """
     Fetch all unique TF names from tfbs_name_counts table for autocomplete.
@@ -1498,68 +1906,158 @@ def get_all_tf_names(request):
     species = request.GET.get('species', 'human')
     query = request.GET.get('query', '').lower()
     
-    db_alias = 'human' if species == 'human' else 'mouse'
-    
     try:
-        with connections[db_alias].cursor() as cursor:
-            if query:
-                # Search for TF names that contain the query
-                cursor.execute('''
-                    SELECT DISTINCT "tfbs"
-                    FROM "tfbs_name_counts"
-                    WHERE LOWER("tfbs") LIKE %s
-                    ORDER BY "tfbs"
-                    LIMIT 20
-                ''', [f'%{query}%'])
-            else:
-                # Return first 20 TF names if no query
-                cursor.execute('''
-                    SELECT DISTINCT "tfbs"
-                    FROM "tfbs_name_counts"
-                    ORDER BY "tfbs"
-                    LIMIT 20
-                ''')
-            
-            tf_names = [row[0] for row in cursor.fetchall()]
-            
-            return JsonResponse({
+        index = load_tf_names(species)
+        if query:
+            # Names starting with the query first, found by binary search
+            tf_names = []
+            position = bisect_left(index.prefix_keys, query)
+            while (len(tf_names) < 20 and position < len(index.prefix_keys)
+                   and index.prefix_keys[position].startswith(query)):
+                tf_names.append(index.prefix_names[position])
+                position += 1
+            if len(tf_names) < 20:
+                # Then other substring matches, as LOWER("tfbs") LIKE '%query%'
+                matches = (name for name, lowered in zip(index.names, index.lowered)
+                           if query in lowered and not lowered.startswith(query))
+                tf_names += islice(matches, 20 - len(tf_names))
+            body = orjson.dumps({
                 'success': True,
                 'tf_names': tf_names
             })
-            
+        else:
+            # First 20 TF names if no query, serialised once per process
+            body = index.first_json
+        
+        response = HttpResponse(body, content_type='application/json')
+        patch_cache_control(response, public=True, max_age=300)
+        return response
+        
     except Exception as e:
-        return JsonResponse({
+        return error_response_headers(JsonResponse({
             'success': False,
             'error': str(e)
-        }, status=500)
+        }, status=500))
+
+# Module-level cache: species -> ((CSV mtime, JSON mtime), ready-to-send body for /api/cell-tissues/)
+_cell_tissues_json_cache = {}
+# Held while a body is (re)built, so concurrent requests wait for one build
+_cell_tissues_json_lock = threading.Lock()
+
+def cell_tissues_csv(species):
+    """Return (path, mtime) of the species' cell/tissue CSV, mtime 0 if missing."""
+    csv_path = f"staticfiles/documents/cell_tissue_unique_{species}.csv"
+    mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
+    return csv_path, mtime
+
+def cell_tissues_json_path(species):
+    """Path of the pre-built /api/cell-tissues/ body written by build_cell_tissue_json."""
+    return f"staticfiles/documents/cell_tissue_unique_{species}.json"
+
+def build_cell_tissues_json(species):
+    """Parse the species' cell/tissue CSV and return the /api/cell-tissues/ body as bytes."""
+    csv_path, mtime = cell_tissues_csv(species)
+    cell_tissues = []
+    if mtime:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                name = row.get('cell_tissue', '').strip()
+                if name:
+                    cell_tissues.append(name)
+    return orjson.dumps({'success': True, 'cell_tissues': cell_tissues})
+
+def load_cell_tissues_json(species):
+    """
+    Return the /api/cell-tissues/ response body for a species as bytes.
+
+    Strategy (fastest first):
+      1. In-memory cache  — revalidated against the CSV and JSON mtimes
+      2. Pre-built JSON   — staticfiles/documents/cell_tissue_unique_{species}.json,
+                            read as-is when not older than the CSV
+      3. CSV file         — parsed and serialised in-process
+    """
+    _, csv_mtime = cell_tissues_csv(species)
+    json_path = cell_tissues_json_path(species)
+    json_mtime = os.path.getmtime(json_path) if os.path.exists(json_path) else 0
+    version = (csv_mtime, json_mtime)
+    cached = _cell_tissues_json_cache.get(species)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _cell_tissues_json_lock:
+        # Another request may have built it while this one waited
+        cached = _cell_tissues_json_cache.get(species)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        if json_mtime and json_mtime >= csv_mtime:
+            with open(json_path, 'rb') as f:
+                body = f.read()
+        else:
+            body = build_cell_tissues_json(species)
+        _cell_tissues_json_cache[species] = (version, body)
+        return body
+
+def cell_tissues_etag(request):
+    """ETag for the cell/tissue list: changes only when the CSV is rebuilt."""
+    species = request.GET.get('species', 'human')
+    _, mtime = cell_tissues_csv(species)
+    key = f'{settings.TFBS_DATA_VERSION}:{species}:{mtime}'
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
 
+@etag_condition(cell_tissues_etag)
 def get_all_cell_tissues(request):
     """
     Return all unique cell/tissue types from the pre-built CSV files.
     """
     species = request.GET.get('species', 'human')
-    csv_path = f"staticfiles/documents/cell_tissue_unique_{species}.csv"
 
     try:
-        cell_tissues = []
-        if os.path.exists(csv_path):
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    name = row.get('cell_tissue', '').strip()
-                    if name:
-                        cell_tissues.append(name)
-
-        return JsonResponse({
-            'success': True,
-            'cell_tissues': cell_tissues
-        })
+        response = HttpResponse(load_cell_tissues_json(species), content_type='application/json')
+        # The list only changes with a CSV rebuild; the ETag revalidates after that
+        patch_cache_control(response, public=True, max_age=3600)
+        return response
 
     except Exception as e:
-        return JsonResponse({
+        return error_response_headers(JsonResponse({
             'success': False,
             'error': str(e)
-        }, status=500)
+        }, status=500))
+
+# Module-level cache: CSV path -> (mtime, data row count)
+_csv_row_counts = {}
+
+def count_csv_rows(csv_path):
+    """
+    Return the number of data rows in a one-column CSV (0 if missing),
+    counted once per process and again only when the file's mtime changes.
+
+    Rows are counted as line breaks in raw binary chunks, without decoding
+    or parsing the file.
+    """
+    mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
+    cached = _csv_row_counts.get(csv_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    total = 0
+    if mtime:
+        lines = 0
+        last = b'\n'
+        with open(csv_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+        if last != b'\n':
+            lines += 1  # last row has no trailing newline
+        total = max(lines - 1, 0)  # minus the header
+    _csv_row_counts[csv_path] = (mtime, total)
+    return total
+
+def count_unique_items(text):
+    """Number of distinct non-empty items in a comma-separated string."""
+    return len({item.strip() for item in text.split(',') if item.strip()})
 
 def get_proportion_info(tfbs_names, predicted_tfbs, cell_tissue_info, species='human'):
     """
@@ -1572,44 +2070,20 @@ def get_proportion_info(tfbs_names, predicted_tfbs, cell_tissue_info, species='h
         'cell_tissue': '0/0'
     }
     
-    # Determine file paths based on species
-    tfbs_file = f"static/documents/tfbs_unique_{species}.csv"
-    cell_tissue_file = f"static/documents/cell_tissue_unique_{species}.csv"
-    
-    # Get total counts from CSV files
-    tfbs_total = 0
-    cell_tissue_total = 0
-    
-    # Read TF names CSV
-    if os.path.exists(tfbs_file):
-        with open(tfbs_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            tfbs_list = [row['tfbs'] for row in reader]
-            tfbs_total = len(tfbs_list)
-    
-    # Read cell/tissue CSV
-    if os.path.exists(cell_tissue_file):
-        with open(cell_tissue_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            cell_tissue_list = [row['cell_tissue'] for row in reader]
-            cell_tissue_total = len(cell_tissue_list)
+    # Get total counts from the per-species CSV files
+    tfbs_total = count_csv_rows(f"static/documents/tfbs_unique_{species}.csv")
+    cell_tissue_total = count_csv_rows(f"static/documents/cell_tissue_unique_{species}.csv")
     
     # Calculate proportions for TF names (unique count)
     if tfbs_names and tfbs_total > 0:
-        tfbs_items = [item.strip() for item in tfbs_names.split(',') if item.strip()]
-        unique_tfbs = set(tfbs_items)  # Get unique TF names
-        proportions['tf_names'] = f"{len(unique_tfbs)}/{tfbs_total}"
+        proportions['tf_names'] = f"{count_unique_items(tfbs_names)}/{tfbs_total}"
     
     # Calculate proportions for predicted TF names (unique count)
     if predicted_tfbs and tfbs_total > 0:
-        predicted_items = [item.strip() for item in predicted_tfbs.split(',') if item.strip()]
-        unique_predicted = set(predicted_items)  # Get unique predicted TF names
-        proportions['predicted_tf_names'] = f"{len(unique_predicted)}/{tfbs_total}"
+        proportions['predicted_tf_names'] = f"{count_unique_items(predicted_tfbs)}/{tfbs_total}"
     
     # Calculate proportions for cell/tissue (unique count)
     if cell_tissue_info and cell_tissue_total > 0:
-        cell_tissue_items = [item.strip() for item in cell_tissue_info.split(',') if item.strip()]
-        unique_cell_tissue = set(cell_tissue_items)  # Get unique cell/tissue types
-        proportions['cell_tissue'] = f"{len(unique_cell_tissue)}/{cell_tissue_total}"
+        proportions['cell_tissue'] = f"{count_unique_items(cell_tissue_info)}/{cell_tissue_total}"
     
     return proportions
\ No newline at end of file
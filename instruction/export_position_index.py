@@ -0,0 +1,88 @@
+import psycopg2
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Usage: python export_position_index.py [human] [mouse]  (default: both)
+SPECIES = ("human", "mouse")
+
+OUTPUT_DIR = "./TFBSpedia_django/staticfiles/documents/position_index_{species}"
+
+DB_CONFIG = dict(
+    dbname="tfbspedia_{species}",
+    user="postgres",
+    password="",
+    host="localhost",
+    port="5432"
+)
+
+
+def export_chromosome(conn, chromosome, output_dir):
+    """Write one chromosome of TFBS_position as a (3, n) int64 array of start, end, ID."""
+    # Named (server-side) cursor so large chromosomes are streamed, not buffered
+    cursor = conn.cursor(name=f"position_index_{chromosome}")
+    cursor.itersize = 100000
+    cursor.execute('''
+        SELECT "start", "end", "ID"
+        FROM "TFBS_position"
+        WHERE "seqnames" = %s
+        ORDER BY "start", "end", "ID"
+    ''', [chromosome])
+
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(cursor.itersize)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int64))
+    cursor.close()
+
+    table = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+    # Row-major (3, n) so each column is contiguous when memory-mapped
+    save_atomic(os.path.join(output_dir, f"{chromosome}.npy"), np.ascontiguousarray(table.T))
+    return len(table)
+
+
+def save_atomic(path, array):
+    """Save `array` to `path` via a temporary file, so the site never maps a half-written index."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npy.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_species(species):
+    output_dir = OUTPUT_DIR.format(species=species)
+    os.makedirs(output_dir, exist_ok=True)
+
+    conn = psycopg2.connect(**dict(DB_CONFIG, dbname=DB_CONFIG["dbname"].format(species=species)))
+    cursor = conn.cursor()
+    cursor.execute('SELECT DISTINCT "seqnames" FROM "TFBS_position";')
+    chromosomes = sorted(row[0] for row in cursor.fetchall())
+    cursor.close()
+
+    print(f"Exporting {species} position index for {len(chromosomes)} chromosomes...")
+    for chromosome in chromosomes:
+        count = export_chromosome(conn, chromosome, output_dir)
+        print(f"  {chromosome}: {count} rows")
+
+    conn.close()
+    print(f"Done. Files written to {output_dir}")
+
+
+def main():
+    species_list = sys.argv[1:] or SPECIES
+    for species in species_list:
+        if species not in SPECIES:
+            sys.exit(f"Unknown species {species!r}; expected one of {', '.join(SPECIES)}")
+    for species in species_list:
+        export_species(species)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import psycopg2
 import csv
 import os
-import multiprocessing
-from collections import defaultdict
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import groupby
+from operator import itemgetter
 
 OUTPUT_DIR = "./TFBSpedia_django/staticfiles/documents/cell_lines_ID_mouse"
 
@@ -15,53 +16,68 @@ DB_CONFIG = dict(
     port="5432"
 )
 
+# Tissue name -> file name: spaces and slashes become "_", commas are dropped
+FILENAME_TABLE = str.maketrans({" ": "_", ",": None, "/": "_"})
+
 
 def write_tissue_file(args):
     """Worker function: write one CSV file for a cell tissue."""
     tissue_name, ids, output_dir = args
-    safe_filename = tissue_name.replace(" ", "_").replace(",", "").replace("/", "_") + ".csv"
+    safe_filename = tissue_name.translate(FILENAME_TABLE) + ".csv"
     file_path = os.path.join(output_dir, safe_filename)
-    with open(file_path, mode='w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["ID"])
-        writer.writerows([i] for i in ids)
+    # Plain integers need no CSV quoting: write the column as ASCII bytes in one call
+    with open(file_path, mode='wb') as f:
+        f.write(("ID\n" + "\n".join(map(str, ids)) + "\n").encode('ascii'))
     return tissue_name
 
 
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # Single bulk query instead of one query per tissue
-    print("Fetching all data in a single query...")
+    # Let the server write the CSV (COPY) into a spool file rather than
+    # building one Python tuple per row with fetchall()
+    print("Exporting all data with COPY...")
     conn = psycopg2.connect(**DB_CONFIG)
     cursor = conn.cursor()
-    cursor.execute('SELECT cell_tissue, "ID" FROM "TFBS_cell_or_tissue";')
-
-    tissue_ids = defaultdict(list)
-    for cell_tissue, id_val in cursor.fetchall():
-        if cell_tissue:
-            tissue_ids[cell_tissue].append(id_val)
-
+    spool = tempfile.TemporaryFile(mode='w+', newline='')
+    cursor.copy_expert(
+        'COPY (SELECT cell_tissue, "ID" FROM "TFBS_cell_or_tissue" '
+        "WHERE cell_tissue IS NOT NULL AND cell_tissue <> '' "
+        'ORDER BY cell_tissue) TO STDOUT WITH CSV',
+        spool,
+    )
     cursor.close()
     conn.close()
+    spool.seek(0)
 
-    total = len(tissue_ids)
-    print(f"Found {total} unique cell lines/tissues. Writing files with multiprocessing...")
-
-    work_items = [(tissue, ids, OUTPUT_DIR) for tissue, ids in tissue_ids.items()]
-    n_workers = 8
-
+    # Writing files is I/O bound, so threads: no pickling of ID lists
+    n_workers = 32
+    # Tissues read but not yet written; caps how many ID lists are in memory
+    max_pending = n_workers * 2
     completed = 0
-    with ProcessPoolExecutor(max_workers=n_workers) as executor:
-        futures = {executor.submit(write_tissue_file, item): item[0] for item in work_items}
-        for future in as_completed(futures):
+
+    def collect(done):
+        nonlocal completed
+        for future in done:
             future.result()  # re-raises any worker exception
             completed += 1
-            if completed % 100 == 0 or completed == total:
-                print(f"  {completed}/{total} files written...")
+            if completed % 100 == 0:
+                print(f"  {completed} files written...")
 
-    print(f"Export complete! All {total} files saved to: {OUTPUT_DIR}")
+    print("Writing files...")
+    with spool, ThreadPoolExecutor(max_workers=n_workers) as executor:
+        # Rows arrive ordered by cell_tissue, so each tissue's IDs are
+        # handed to a worker as soon as the next tissue starts
+        pending = set()
+        for tissue, rows in groupby(csv.reader(spool), key=itemgetter(0)):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            ids = [row[1] for row in rows]
+            pending.add(executor.submit(write_tissue_file, (tissue, ids, OUTPUT_DIR)))
+        collect(wait(pending).done)
 
+    print(f"Export complete! All {completed} files saved to: {OUTPUT_DIR}")
 
 if __name__ == "__main__":
     main()